@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Minimal CRM web UI for leads.db — zero external dependencies.
-Uses only Python stdlib: http.server, sqlite3, json.
+Uses only Python stdlib: http.server, sqlite3, json. If orjson happens to be
+installed it is used for faster JSON encoding/decoding.
 
 Usage:
     python3 crm.py              # opens on port 8080
@@ -9,16 +10,242 @@ Usage:
 """
 
 import argparse
+import gzip
+import hashlib
 import json
 import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import parse_qs, urlparse
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "leads.db")
+LOG_PATH = os.path.join(os.path.dirname(DB_PATH), "activity_log.jsonl")
 PENDING = {"phone": "", "msg": ""}
 
+# Idle connections shared by all handler threads (see _connection).
+# ThreadingHTTPServer starts a fresh thread per request, so connections are
+# pooled rather than tied to a thread; LIFO keeps the warmest one in use.
+_pool = queue.LifoQueue()
+
+# activity_log.jsonl stays open for appending instead of being reopened per
+# POST /api/log. Lines queue in _log_pending and are written in batches by
+# _append_log; _log_write_lock admits one writer at a time.
+_log_file = None
+_log_pending = []
+_log_lock = threading.Lock()
+_log_write_lock = threading.Lock()
+
+# Set by _ensure_fts at startup once the leads_fts search index is usable.
+_fts_enabled = False
+
+# Compact JSON for API responses. The encoder is stateless and shared; each
+# handler thread serializes into its own reusable buffer (see _encode_json).
+# orjson, when available, produces the same compact UTF-8 output directly.
+_json_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+_tls = threading.local()
+
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps(obj):
+        return _json_encoder.encode(obj).encode()
+    _loads = json.loads
+
+# Columns the CRM page reads, plus two display values derived in SQL so the
+# browser doesn't recompute them per row on every render.
+_LEAD_COLUMNS = """
+    name, phone, category, website, rating, review_count, score_reasons,
+    last_contacted, contact_status, lead_score, maps_link, notes, scraped_at,
+    CASE WHEN lead_score >= 7 THEN 'score-high'
+         WHEN lead_score >= 4 THEN 'score-med'
+         ELSE 'score-low' END AS score_class,
+    RTRIM(CASE WHEN website LIKE 'https://%' THEN substr(website, 9)
+               WHEN website LIKE 'http://%' THEN substr(website, 8)
+               ELSE website END, '/') AS website_short
+"""
+
+# SQL kept as module constants so sqlite3's per-connection statement cache
+# gets a hit on every request instead of re-preparing the same text.
+_SQL_UPDATE_LEAD_BASE = (
+    "UPDATE leads SET contact_status=?, last_contacted=?, notes=?, updated_at=?"
+    " WHERE maps_link=?"
+)
+_SQL_UPDATE_LEAD = _SQL_UPDATE_LEAD_BASE + " RETURNING " + _LEAD_COLUMNS
+# RETURNING needs SQLite 3.35+. Older libraries read the rows with a plain
+# SELECT inside the same write transaction instead.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+_SQL_LEAD_BY_LINK = "SELECT " + _LEAD_COLUMNS + " FROM leads WHERE maps_link=?"
+# Bulk deletes stage their keys in a per-connection temp table, so the same
+# three statements serve any number of links (no 999-parameter limit).
+_SQL_CREATE_DEL_TMP = "CREATE TEMP TABLE IF NOT EXISTS _del(link TEXT PRIMARY KEY)"
+_SQL_INSERT_DEL_TMP = "INSERT OR IGNORE INTO _del VALUES (?)"
+_SQL_DELETE_STAGED_BASE = "DELETE FROM leads WHERE maps_link IN (SELECT link FROM _del)"
+_SQL_DELETE_STAGED = _SQL_DELETE_STAGED_BASE + " RETURNING maps_link"
+_SQL_SELECT_STAGED = "SELECT maps_link FROM leads WHERE maps_link IN (SELECT link FROM _del)"
+
+# /api/leads filters, sorts and pages in SQL. Sort column and direction are
+# whitelisted, so every (col, dir, status filter?, search kind) combination
+# maps to one fixed statement. The status test is left out entirely when
+# unfiltered, rather than written as ":status IS NULL OR ...", so the planner
+# can use idx_leads_status_score for it. Searches of three or more characters
+# go through the leads_fts trigram index (see _ensure_fts); shorter ones, or
+# all of them if FTS5 is unavailable, fall back to LIKE scans. The rowid
+# tie-break keeps paging stable and runs opposite to the sort so that the
+# lead_score indexes (lead_score DESC, rowid ASC) still cover the whole
+# ORDER BY.
+_LEAD_SORT_COLS = frozenset({
+    "lead_score", "contact_status", "name", "phone", "website",
+    "rating", "review_count", "last_contacted", "scraped_at",
+})
+_NUMERIC_SORT_COLS = frozenset({"lead_score", "rating", "review_count"})
+_SQL_LEADS_SEARCH = {
+    None: "",
+    "like": (
+        " AND (name LIKE :q ESCAPE '\\' OR phone LIKE :q ESCAPE '\\'"
+        " OR category LIKE :q ESCAPE '\\' OR address LIKE :q ESCAPE '\\'"
+        " OR notes LIKE :q ESCAPE '\\')"
+    ),
+    "fts": " AND rowid IN (SELECT rowid FROM leads_fts WHERE leads_fts MATCH :fts)",
+}
+_SQL_LEADS_WHERE = {
+    (by_status, search): (
+        (" WHERE contact_status = :status AND" if by_status else " WHERE")
+        + " lead_score >= :min_score" + search_sql
+    )
+    for by_status in (False, True)
+    for search, search_sql in _SQL_LEADS_SEARCH.items()
+}
+_SQL_COUNT_LEADS = {
+    key: "SELECT COUNT(*) FROM leads" + where
+    for key, where in _SQL_LEADS_WHERE.items()
+}
+_SQL_LEADS_PAGE = {
+    (col, d, *key): (
+        f"SELECT {_LEAD_COLUMNS} FROM leads{where} ORDER BY {col}"
+        f"{'' if col in _NUMERIC_SORT_COLS else ' COLLATE NOCASE'} {d}, rowid {tie}"
+        " LIMIT :limit OFFSET :offset"
+    )
+    for col in _LEAD_SORT_COLS
+    for d, tie in (("ASC", "DESC"), ("DESC", "ASC"))
+    for key, where in _SQL_LEADS_WHERE.items()
+}
+# Search index over the text columns /api/leads matches against. It is an
+# external-content table (the text lives only in leads), kept in step by
+# triggers so scraper.py's inserts are indexed too. The trigram tokenizer
+# makes a quoted phrase match any substring, the same results as the LIKE
+# '%q%' it replaces.
+_FTS_COLS = "name, phone, category, address, notes"
+_SQL_CREATE_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5({_FTS_COLS},"
+    " content='leads', content_rowid='rowid', tokenize='trigram')"
+)
+_SQL_FTS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS leads_fts_ai AFTER INSERT ON leads BEGIN
+        INSERT INTO leads_fts(rowid, {_FTS_COLS})
+        VALUES (new.rowid, new.name, new.phone, new.category, new.address, new.notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS leads_fts_ad AFTER DELETE ON leads BEGIN
+        INSERT INTO leads_fts(leads_fts, rowid, {_FTS_COLS})
+        VALUES ('delete', old.rowid, old.name, old.phone, old.category, old.address, old.notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS leads_fts_au AFTER UPDATE OF {_FTS_COLS} ON leads BEGIN
+        INSERT INTO leads_fts(leads_fts, rowid, {_FTS_COLS})
+        VALUES ('delete', old.rowid, old.name, old.phone, old.category, old.address, old.notes);
+        INSERT INTO leads_fts(rowid, {_FTS_COLS})
+        VALUES (new.rowid, new.name, new.phone, new.category, new.address, new.notes);
+    END""",
+)
+_FTS_TRIGGER_NAMES = ("leads_fts_ai", "leads_fts_ad", "leads_fts_au")
+_SQL_FTS_OBJECTS = "SELECT name FROM sqlite_master WHERE name IN (?, ?, ?, ?)"
+# Opening leads_fts needs FTS5 and the trigram tokenizer; the schema entry
+# alone doesn't prove this SQLite has them.
+_SQL_FTS_PROBE = "SELECT 1 FROM leads_fts WHERE leads_fts MATCH '\"abc\"' LIMIT 1"
+# Row count and rowid sum of the index against the table: a mismatch means
+# rows went unindexed or a VACUUM renumbered the leads rowids.
+# Same column names in both, since sqlite3.Row equality compares those too.
+_SQL_FTS_FINGERPRINT = "SELECT COUNT(*) AS n, TOTAL(id) AS ids FROM leads_fts_docsize"
+_SQL_LEADS_FINGERPRINT = "SELECT COUNT(*) AS n, TOTAL(rowid) AS ids FROM leads"
+_FTS_MIN_QUERY = 3  # trigrams can't match anything shorter
+_SQL_STATS = """
+    SELECT COUNT(*) AS total,
+           COALESCE(SUM(lead_score >= 5), 0) AS high_priority,
+           COALESCE(SUM(contact_status = 'new'), 0) AS new,
+           COALESCE(SUM(contact_status = 'contacted'), 0) AS contacted,
+           COALESCE(SUM(contact_status = 'replied'), 0) AS replied,
+           COALESCE(SUM(contact_status = 'closed'), 0) AS closed,
+           COALESCE(SUM(contact_status = 'do_not_contact'), 0) AS do_not_contact
+    FROM leads
+"""
+# [NAME] in the outreach texts: the business name up to its first character
+# that isn't a letter, apostrophe, hyphen or space ("Joe's Plumbing, LLC").
+_FIRST_NAME_END = re.compile(r"[^a-zA-Z'\- ]")
+_DEFAULT_PAGE_SIZE = 200
+_MAX_PAGE_SIZE = 1000
+# Below this a gzip header and trailer cost about as much as they save.
+_GZIP_MIN_SIZE = 1024
+# Largest POST body accepted. A delete of a full 1000-row page is the
+# biggest legitimate payload, at roughly 200 KB of Maps links.
+_MAX_POST_BODY = 1024 * 1024
+# A delete this large shifts the lead_score/status distribution enough to
+# refresh planner statistics right away rather than at the next hourly pass.
+_OPTIMIZE_AFTER_DELETES = 100
+
+# One activity_log.jsonl record. The schema is fixed, so only the values go
+# through the JSON encoder; the keys and punctuation are spliced in as bytes.
+_LOG_LINE = b'{"timestamp":%s,"salesman":%s,"action":%s,"lead":%s,"details":%s}\n'
+
+# Cache of serialized /api/leads and /api/stats responses, keyed on
+# (generation, db file version, request path). Every CRM write bumps the
+# generation so the UI sees its own edits at once; the file version (mtime
+# and size of leads.db and its WAL) catches outside writers such as a
+# scraper.py run. The TTL is only a backstop.
+_CACHE_TTL = 60.0
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_gen = 0
+# API ETags are derived from the cache key rather than the body, so they are
+# known before any query runs and an unchanged list revalidates without
+# touching SQLite. The per-process salt keeps tags from surviving a restart,
+# which may come with a different response shape.
+_ETAG_SALT = os.urandom(8)
+# Clients may keep API responses but must revalidate them every time
+_API_CACHE_HEADERS = (("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding"))
+
+# Status line and fixed headers of every JSON 200 response with a known
+# length, encoded once; see _send_raw.
+_JSON_HEAD = (
+    "HTTP/1.1 200 OK\r\n"
+    "Access-Control-Allow-Origin: *\r\n"
+    "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    "Access-Control-Allow-Headers: Content-Type\r\n"
+    "Content-Type: application/json\r\n"
+).encode("latin-1")
+# Preflight answer for the bookmarklet's cross-origin calls. Max-Age lets the
+# browser skip the preflight for a day instead of repeating it per request.
+_OPTIONS_HEAD = (
+    "HTTP/1.1 204 No Content\r\n"
+    "Access-Control-Allow-Origin: *\r\n"
+    "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    "Access-Control-Allow-Headers: Content-Type\r\n"
+    "Access-Control-Max-Age: 86400\r\n"
+).encode("latin-1")
+_API_CACHE_HEAD = b"".join(b"%s: %s\r\n" % (n.encode(), v.encode()) for n, v in _API_CACHE_HEADERS)
+_http_date = (0, b"")  # (second, encoded Date header line) for that second
+
 HTML_PAGE = """<!doctype html>
 <html lang="en">
 <head>
@@ -80,6 +307,11 @@ HTML_PAGE = """<!doctype html>
   .modal-actions button{padding:8px 16px;border-radius:6px;border:1px solid var(--border);background:var(--card);cursor:pointer;font-size:14px}
   .modal-actions .save{background:var(--accent);color:#fff;border-color:var(--accent);font-weight:600}
   .empty{text-align:center;padding:40px;color:var(--muted)}
+  tr.spacer td{padding:0;border:none}
+  tr.spacer:hover{background:none}
+  .pager{display:flex;align-items:center;gap:10px;margin-top:12px;font-size:13px;color:var(--muted)}
+  .pager button{padding:6px 12px;border:1px solid var(--border);border-radius:6px;background:var(--card);cursor:pointer;font-size:13px}
+  .pager button:disabled{opacity:.4;cursor:default}
   .actions button.btn-text{background:#16a34a;color:#fff;border:1px solid #16a34a;font-weight:600}
   .actions button.btn-text:hover{opacity:.85}
   .actions button.btn-text2{background:#0b66ff;color:#fff;border:1px solid #0b66ff;font-weight:600}
@@ -170,6 +402,32 @@ HTML_PAGE = """<!doctype html>
   <tbody id="tbody"></tbody>
 </table>
 
+<template id="rowTpl">
+  <tr>
+    <td><input type="checkbox" class="cb row-cb" onchange="onRowCheck()"></td>
+    <td><span class="score"></span></td>
+    <td><span class="badge"></span></td>
+    <td><strong class="f-name"></strong><br><span class="f-category" style="font-size:11px;color:var(--muted)"></span></td>
+    <td><a class="phone-link"></a></td>
+    <td class="f-web"></td>
+    <td class="f-rating"></td>
+    <td class="f-reviews"></td>
+    <td><span class="reasons"></span></td>
+    <td class="f-last"></td>
+    <td class="f-scraped" style="font-size:11px;color:var(--muted)"></td>
+    <td><div class="actions">
+      <button data-act="edit">Edit</button>
+      <a class="f-maps" target="_blank"><button>Maps</button></a>
+    </div></td>
+  </tr>
+</template>
+
+<div class="pager">
+  <button id="prevPage" onclick="changePage(-1)">&larr; Prev</button>
+  <span id="pageInfo"></span>
+  <button id="nextPage" onclick="changePage(1)">Next &rarr;</button>
+</div>
+
 <div class="overlay" id="overlay">
   <div class="modal">
     <h2 id="modalTitle">Edit Lead</h2>
@@ -219,7 +477,14 @@ const MSG_TEMPLATES = {
   followup: `Hi [NAME], here's the quick audit I mentioned for your Google Business Profile. I found [X] areas for improvement. You can see the details here: clearpresencedigital.com — Happy to walk through it if you have questions. Reply STOP to opt out.`
 };
 
+// Filtering, sorting and paging happen server-side; `leads` holds one page
+const PAGE_SIZE = 200;
 let leads = [];
+let leadByLink = new Map(); // maps_link -> lead, for the loaded page
+let stats = {};
+let totalMatches = 0;
+let offset = 0;
+let loadSeq = 0;
 let sortCol = 'lead_score';
 let sortAsc = false;
 let selected = new Set();
@@ -242,6 +507,50 @@ function initSalesman() {
   }
 }
 
+// The browser's copy of the activity log lives in IndexedDB: logging an
+// action is one insert instead of re-serializing the whole history through
+// localStorage. Auto-increment ids keep entries in the order they happened.
+let logDb = null;
+
+function openLogDb() {
+  if (!logDb) {
+    logDb = new Promise((resolve, reject) => {
+      const req = indexedDB.open('crm_logs', 1);
+      req.onupgradeneeded = () => {
+        const store = req.result.createObjectStore('entries', { keyPath: 'id', autoIncrement: true });
+        // Carry over the old localStorage log (stored newest first)
+        const old = JSON.parse(localStorage.getItem('crm_activity_log') || '[]');
+        for (let i = old.length - 1; i >= 0; i--) store.add(old[i]);
+      };
+      req.onsuccess = () => {
+        localStorage.removeItem('crm_activity_log');
+        resolve(req.result);
+      };
+      req.onerror = () => reject(req.error);
+    });
+  }
+  return logDb;
+}
+
+// Newest `limit` entries, walking the store backwards and stopping early
+async function recentLogs(limit) {
+  const db = await openLogDb();
+  return new Promise((resolve, reject) => {
+    const logs = [];
+    const req = db.transaction('entries').objectStore('entries').openCursor(null, 'prev');
+    req.onsuccess = () => {
+      const cur = req.result;
+      if (cur && logs.length < limit) {
+        logs.push(cur.value);
+        cur.continue();
+      } else {
+        resolve(logs);
+      }
+    };
+    req.onerror = () => reject(req.error);
+  });
+}
+
 function logActivity(action, leadName, details = '') {
   const salesman = getSalesman();
   if (!salesman) {
@@ -255,28 +564,26 @@ function logActivity(action, leadName, details = '') {
     lead: leadName,
     details: details
   };
-  // Store in localStorage (append to array)
-  const logs = JSON.parse(localStorage.getItem('crm_activity_log') || '[]');
-  logs.unshift(entry); // newest first
-  // Keep last 1000 entries
-  if (logs.length > 1000) logs.length = 1000;
-  localStorage.setItem('crm_activity_log', JSON.stringify(logs));
+  // Keep a local copy
+  openLogDb()
+    .then(db => db.transaction('entries', 'readwrite').objectStore('entries').add(entry))
+    .catch(() => {});
   // Also send to server for permanent storage
   fetch('/api/log', {
     method: 'POST',
     headers: {'Content-Type': 'application/json'},
     body: JSON.stringify(entry)
-  }).catch(() => {}); // ignore errors, localStorage is backup
+  }).catch(() => {}); // ignore errors, the local copy is backup
   return true;
 }
 
-function showActivityLog() {
-  const logs = JSON.parse(localStorage.getItem('crm_activity_log') || '[]');
+async function showActivityLog() {
+  const logs = await recentLogs(100).catch(() => []);
   const tbody = document.getElementById('logBody');
   if (logs.length === 0) {
     tbody.innerHTML = '<tr><td colspan="4" style="text-align:center;color:var(--muted)">No activity yet</td></tr>';
   } else {
-    tbody.innerHTML = logs.slice(0, 100).map(e => {
+    tbody.innerHTML = logs.map(e => {
       const time = new Date(e.timestamp).toLocaleString();
       return `<tr><td>${time}</td><td>${esc(e.salesman)}</td><td>${esc(e.action)}</td><td>${esc(e.lead)}</td></tr>`;
     }).join('');
@@ -288,136 +595,283 @@ function closeLogModal() {
   document.getElementById('logOverlay').classList.remove('open');
 }
 
+function leadsQuery() {
+  const params = new URLSearchParams({
+    status: document.getElementById('filterStatus').value,
+    min_score: document.getElementById('filterScore').value,
+    q: document.getElementById('searchBox').value.trim(),
+    sort: sortCol,
+    dir: sortAsc ? 'asc' : 'desc',
+    limit: PAGE_SIZE,
+    offset: offset,
+  });
+  return '/api/leads?' + params;
+}
+
+// /api/leads sends the column names once plus one array per lead
+function unpackLeads({ cols, rows }) {
+  return rows.map(r => {
+    const l = {};
+    for (let i = 0; i < cols.length; i++) l[cols[i]] = r[i];
+    return l;
+  });
+}
+
 async function load() {
-  const res = await fetch('/api/leads');
-  leads = await res.json();
+  const seq = ++loadSeq;
+  const [res, statsRes] = await Promise.all([fetch(leadsQuery()), fetch('/api/stats')]);
+  const page = unpackLeads(await res.json());
+  const newStats = await statsRes.json();
+  if (seq !== loadSeq) return; // a newer request superseded this one
+  page.forEach(prepareLead);
+  leads = loaded = page;
+  leadByLink = new Map(page.map(l => [l.maps_link, l]));
+  sortIndex = {};
+  totalMatches = parseInt(res.headers.get('X-Total-Count')) || leads.length;
+  stats = newStats;
   initSalesman();
   render();
 }
 
-function render() {
-  const status = document.getElementById('filterStatus').value;
-  const minScore = parseInt(document.getElementById('filterScore').value) || 0;
-  const search = document.getElementById('searchBox').value.toLowerCase();
-
-  let filtered = leads.filter(l => {
-    if (status && l.contact_status !== status) return false;
-    if (l.lead_score < minScore) return false;
-    if (search) {
-      const hay = [l.name, l.phone, l.category, l.address, l.notes || ''].join(' ').toLowerCase();
-      if (!hay.includes(search)) return false;
-    }
-    return true;
-  });
+async function loadStats() {
+  const res = await fetch('/api/stats');
+  stats = await res.json();
+}
 
-  filtered.sort((a, b) => {
-    let va = a[sortCol] ?? '', vb = b[sortCol] ?? '';
-    if (typeof va === 'number' && typeof vb === 'number') return sortAsc ? va - vb : vb - va;
-    va = String(va).toLowerCase(); vb = String(vb).toLowerCase();
-    return sortAsc ? va.localeCompare(vb) : vb.localeCompare(va);
-  });
+// Stats come from one aggregate query; local status changes adjust the two
+// affected counters instead of recounting
+const STATUS_KEYS = new Set(['new', 'contacted', 'replied', 'closed', 'do_not_contact']);
+function moveStatusCount(from, to) {
+  if (from === to) return;
+  if (STATUS_KEYS.has(from)) stats[from]--;
+  if (STATUS_KEYS.has(to)) stats[to]++;
+}
+
+// Filters changed: go back to the first page
+function refilter() {
+  offset = 0;
+  load();
+}
+
+// Derived display fields, computed once per lead when a page arrives
+const PHONE_RX = /[^+\\d]/g;
+
+function prepareLead(l) {
+  l._phoneClean = (l.phone || '').replace(PHONE_RX, '');
+  l._phoneHref = l.phone
+    ? `https://voice.google.com/u/2/calls?a=nc&n=${encodeURIComponent(l._phoneClean)}`
+    : '#';
+}
 
-  // Stats
-  const total = leads.length;
-  const newC = leads.filter(l => l.contact_status === 'new').length;
-  const contacted = leads.filter(l => l.contact_status === 'contacted').length;
-  const replied = leads.filter(l => l.contact_status === 'replied').length;
-  const closed = leads.filter(l => l.contact_status === 'closed').length;
-  const dnc = leads.filter(l => l.contact_status === 'do_not_contact').length;
-  const highP = leads.filter(l => l.lead_score >= 5).length;
+// === Local re-sorting ===
+// When every match is already loaded, a header click reorders the rows from a
+// cached per-column sorted projection instead of asking the server again.
+const NUMERIC_COLS = new Set(['lead_score', 'rating', 'review_count']);
+let loaded = [];    // rows in the order the server returned them
+let sortIndex = {}; // col -> Uint32Array of indices into `loaded`, ascending
+
+function sortedProjection(col) {
+  if (!sortIndex[col]) {
+    // Nulls sort first ascending, matching SQLite
+    const keys = NUMERIC_COLS.has(col)
+      ? loaded.map(l => l[col] ?? -1)
+      : loaded.map(l => String(l[col] ?? '').toLowerCase());
+    const idx = Uint32Array.from(loaded.keys());
+    idx.sort((a, b) => keys[a] < keys[b] ? -1 : keys[a] > keys[b] ? 1 : a - b);
+    sortIndex[col] = idx;
+  }
+  return sortIndex[col];
+}
+
+function resort() {
+  if (offset > 0 || loaded.length < totalMatches) return refilter();
+  const idx = sortedProjection(sortCol);
+  const n = idx.length;
+  leads = new Array(n);
+  for (let i = 0; i < n; i++) leads[i] = loaded[idx[sortAsc ? i : n - 1 - i]];
+  render();
+}
+
+function changePage(delta) {
+  offset = Math.max(0, offset + delta * PAGE_SIZE);
+  load();
+}
+
+function render() {
+  const s = stats;
   document.getElementById('stats').innerHTML = `
-    <div class="stat"><div class="n">${total}</div><div class="label">Total leads</div></div>
-    <div class="stat"><div class="n">${highP}</div><div class="label">High priority (5+)</div></div>
-    <div class="stat"><div class="n">${newC}</div><div class="label">New</div></div>
-    <div class="stat"><div class="n">${contacted}</div><div class="label">Contacted</div></div>
-    <div class="stat"><div class="n">${replied}</div><div class="label">Replied</div></div>
-    <div class="stat"><div class="n">${closed}</div><div class="label">Closed</div></div>
-    ${dnc > 0 ? `<div class="stat"><div class="n" style="color:var(--red)">${dnc}</div><div class="label">Do Not Contact</div></div>` : ''}
+    <div class="stat"><div class="n">${s.total}</div><div class="label">Total leads</div></div>
+    <div class="stat"><div class="n">${s.high_priority}</div><div class="label">High priority (5+)</div></div>
+    <div class="stat"><div class="n">${s.new}</div><div class="label">New</div></div>
+    <div class="stat"><div class="n">${s.contacted}</div><div class="label">Contacted</div></div>
+    <div class="stat"><div class="n">${s.replied}</div><div class="label">Replied</div></div>
+    <div class="stat"><div class="n">${s.closed}</div><div class="label">Closed</div></div>
+    ${s.do_not_contact > 0 ? `<div class="stat"><div class="n" style="color:var(--red)">${s.do_not_contact}</div><div class="label">Do Not Contact</div></div>` : ''}
   `;
   document.getElementById('dbpath').textContent = 'leads.db';
 
+  document.getElementById('pageInfo').textContent = totalMatches
+    ? `${offset + 1}–${offset + leads.length} of ${totalMatches}`
+    : '';
+  document.getElementById('prevPage').disabled = offset === 0;
+  document.getElementById('nextPage').disabled = offset + leads.length >= totalMatches;
+
+  renderWindow(true);
+}
+
+// === Windowed table rendering ===
+// Only rows near the viewport are in the DOM; spacer rows above and below
+// stand in for the rest so the page keeps its full scroll height.
+const ROW_BUFFER = 10;
+let rowH = 0;
+let winStart = -1, winEnd = -1;
+let windowQueued = false;
+
+function renderWindow(force) {
   const tbody = document.getElementById('tbody');
-  if (filtered.length === 0) {
+  if (leads.length === 0) {
     tbody.innerHTML = '<tr><td colspan="12" class="empty">No leads match your filters</td></tr>';
+    winStart = winEnd = -1;
     return;
   }
+  if (!rowH) {
+    // Measure one real row, once
+    tbody.replaceChildren(rowNode(leads[0]));
+    rowH = tbody.firstElementChild.getBoundingClientRect().height || 36;
+  }
+  const scrolled = Math.max(0, -tbody.getBoundingClientRect().top);
+  const start = Math.max(0, Math.floor(scrolled / rowH) - ROW_BUFFER);
+  const end = Math.min(leads.length, start + Math.ceil(window.innerHeight / rowH) + 2 * ROW_BUFFER);
+  if (!force && start === winStart && end === winEnd) return;
+  winStart = start; winEnd = end;
+  const frag = document.createDocumentFragment();
+  addSpacer(frag, start * rowH);
+  for (let i = start; i < end; i++) frag.appendChild(rowNode(leads[i]));
+  addSpacer(frag, (leads.length - end) * rowH);
+  tbody.replaceChildren(frag);
+}
 
-  tbody.innerHTML = filtered.map(l => {
-    const sc = l.lead_score;
-    const scClass = sc >= 7 ? 'score-high' : sc >= 4 ? 'score-med' : 'score-low';
-    const bClass = 'badge-' + (l.contact_status || 'new');
-    const phone = l.phone || '—';
-    const phoneClean = phone.replace(/[^+\\d]/g, '');
-    const phoneHref = phone !== '—' ? `https://voice.google.com/u/2/calls?a=nc&n=${encodeURIComponent(phoneClean)}` : '#';
-    const web = l.website || '';
-    const webShort = web ? web.replace(/^https?:\\/\\//, '').replace(/\\/$/, '') : '—';
-    const rating = l.rating != null ? l.rating.toFixed(1) : '—';
-    const reviews = l.review_count != null ? l.review_count : '—';
-    const reasons = l.score_reasons || '';
-    const lastC = l.last_contacted || '—';
-    const link = encodeURIComponent(l.maps_link);
-    const checked = selected.has(l.maps_link) ? 'checked' : '';
-    return `<tr>
-      <td><input type="checkbox" class="cb row-cb" data-link="${link}" ${checked} onchange="onRowCheck()"></td>
-      <td><span class="score ${scClass}">${sc}</span></td>
-      <td><span class="badge ${bClass}">${l.contact_status || 'new'}</span></td>
-      <td><strong>${esc(l.name)}</strong><br><span style="font-size:11px;color:var(--muted)">${esc(l.category || '')}</span></td>
-      <td><a class="phone-link" href="${phoneHref}">${esc(phone)}</a></td>
-      <td>${web ? `<a class="web-link" href="${esc(web)}" target="_blank">${esc(webShort)}</a>` : '—'}</td>
-      <td>${rating}</td>
-      <td>${reviews}</td>
-      <td><span class="reasons">${esc(reasons)}</span></td>
-      <td>${lastC}</td>
-      <td style="font-size:11px;color:var(--muted)">${l.scraped_at ? l.scraped_at.split('T')[0] : '—'}</td>
-      <td><div class="actions">
-        <button onclick="openEdit('${link}')">Edit</button>
-        <a href="${esc(l.maps_link)}" target="_blank"><button>Maps</button></a>
-        ${getTextButtons(l, link, phone)}
-      </div></td>
-    </tr>`;
-  }).join('');
-}
-
-function esc(s) { const d = document.createElement('div'); d.textContent = s; return d.innerHTML; }
-
-// Returns appropriate text button(s) based on lead status
-function getTextButtons(lead, link, phone) {
-  if (phone === '—') return '';
-  const status = lead.contact_status || 'new';
-  const phoneClean = phone.replace(/[^+\\d]/g, '');
-
-  // Call button (always shown if phone exists, except for do_not_contact)
-  const callBtn = status !== 'do_not_contact'
-    ? `<button class="btn-call" onclick="makeCall('${link}', '${phoneClean}')" title="Call via tel:">Call</button>`
-    : '';
+function addSpacer(frag, h) {
+  if (h <= 0) return;
+  const tr = document.createElement('tr');
+  tr.className = 'spacer';
+  const td = tr.appendChild(document.createElement('td'));
+  td.colSpan = 12;
+  td.style.height = h + 'px';
+  frag.appendChild(tr);
+}
 
-  // No text buttons for closed or do_not_contact
-  if (status === 'closed' || status === 'do_not_contact') return callBtn;
+function queueWindow() {
+  if (windowQueued) return;
+  windowQueued = true;
+  requestAnimationFrame(() => { windowQueued = false; renderWindow(false); });
+}
 
-  // For NEW leads: show "Text 1" (initial outreach)
-  if (status === 'new') {
-    return `${callBtn}<button class="btn-text" onclick="sendText('${link}', 'initial')">Text 1</button>`;
+window.addEventListener('scroll', queueWindow, { passive: true });
+window.addEventListener('resize', queueWindow, { passive: true });
+
+// Rows are cloned from the pre-parsed <template> and filled via textContent,
+// which also takes care of HTML escaping
+const rowTpl = document.getElementById('rowTpl').content.firstElementChild;
+
+function rowNode(l) {
+  const tr = rowTpl.cloneNode(true);
+  const q = sel => tr.querySelector(sel);
+  const sc = l.lead_score;
+  const status = l.contact_status || 'new';
+  const phone = l.phone || '—';
+
+  tr.dataset.link = l.maps_link;
+  const cb = q('.row-cb');
+  cb.dataset.link = l.maps_link;
+  cb.checked = selected.has(l.maps_link);
+  const score = q('.score');
+  score.classList.add(l.score_class);
+  score.textContent = sc;
+  const badge = q('.badge');
+  badge.classList.add('badge-' + status);
+  badge.textContent = status;
+  q('.f-name').textContent = l.name;
+  q('.f-category').textContent = l.category || '';
+  const phoneA = q('.phone-link');
+  phoneA.href = l._phoneHref;
+  phoneA.textContent = phone;
+  const webTd = q('.f-web');
+  if (l.website) {
+    const a = webTd.appendChild(document.createElement('a'));
+    a.className = 'web-link';
+    a.href = l.website;
+    a.target = '_blank';
+    a.textContent = l.website_short;
+  } else {
+    webTd.textContent = '—';
   }
+  q('.f-rating').textContent = l.rating != null ? l.rating.toFixed(1) : '—';
+  q('.f-reviews').textContent = l.review_count != null ? l.review_count : '—';
+  q('.reasons').textContent = l.score_reasons || '';
+  q('.f-last').textContent = l.last_contacted || '—';
+  q('.f-scraped').textContent = l.scraped_at ? l.scraped_at.split('T')[0] : '—';
+  q('.f-maps').href = l.maps_link;
+  addTextButtons(q('.actions'), l, phone);
+  return tr;
+}
 
-  // For CONTACTED leads: show both options
-  if (status === 'contacted') {
-    return `${callBtn}<div class="btn-group">
-      <button class="btn-text" onclick="sendText('${link}', 'initial')" title="Resend initial">1</button>
-      <button class="btn-text2" onclick="sendText('${link}', 'followup')" title="Send audit follow-up">2</button>
-    </div>`;
-  }
+// Row buttons carry a data-act and the row its lead's link, so one
+// delegated listener serves every row
+document.getElementById('tbody').addEventListener('click', e => {
+  const btn = e.target.closest('button[data-act]');
+  if (!btn) return;
+  const link = btn.closest('tr').dataset.link;
+  const act = btn.dataset.act;
+  if (act === 'edit') openEdit(link);
+  else if (act === 'call') makeCall(link);
+  else sendText(link, act);
+});
+
+// HTML-escape for the few places still built as markup (activity log, toast)
+const ESC_MAP = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+const ESC_RX = /[&<>"']/g;
+function esc(s) { return s == null ? '' : String(s).replace(ESC_RX, c => ESC_MAP[c]); }
+
+function actionButton(cls, act, label, title) {
+  const b = document.createElement('button');
+  b.className = cls;
+  b.dataset.act = act;
+  b.textContent = label;
+  if (title) b.title = title;
+  return b;
+}
 
-  // For REPLIED leads: show "Text 2" (follow-up with audit)
-  if (status === 'replied') {
-    return `${callBtn}<button class="btn-text2" onclick="sendText('${link}', 'followup')">Text 2</button>`;
+// Appends the call/text button(s) that fit the lead's status
+function addTextButtons(cell, lead, phone) {
+  if (phone === '—') return;
+  const status = lead.contact_status || 'new';
+
+  // Call button (always shown if phone exists, except for do_not_contact)
+  if (status !== 'do_not_contact') {
+    cell.appendChild(actionButton('btn-call', 'call', 'Call', 'Call via tel:'));
   }
 
-  return callBtn;
+  // No text buttons for closed or do_not_contact
+  if (status === 'new') {
+    // For NEW leads: show "Text 1" (initial outreach)
+    cell.appendChild(actionButton('btn-text', 'initial', 'Text 1'));
+  } else if (status === 'contacted') {
+    // For CONTACTED leads: show both options
+    const group = cell.appendChild(document.createElement('div'));
+    group.className = 'btn-group';
+    group.append(
+      actionButton('btn-text', 'initial', '1', 'Resend initial'),
+      actionButton('btn-text2', 'followup', '2', 'Send audit follow-up'),
+    );
+  } else if (status === 'replied') {
+    // For REPLIED leads: show "Text 2" (follow-up with audit)
+    cell.appendChild(actionButton('btn-text2', 'followup', 'Text 2'));
+  }
 }
 
-function openEdit(encodedLink) {
-  const link = decodeURIComponent(encodedLink);
-  const l = leads.find(x => x.maps_link === link);
+function openEdit(link) {
+  const l = leadByLink.get(link);
   if (!l) return;
   document.getElementById('modalTitle').textContent = l.name;
   document.getElementById('editLink').value = l.maps_link;
@@ -427,11 +881,22 @@ function openEdit(encodedLink) {
   document.getElementById('overlay').classList.add('open');
 }
 
+// The server applies the status filter, so a lead edited out of the active
+// filter (e.g. "new" -> "contacted") is dropped from the page locally
+function dropIfFilteredOut(l) {
+  const status = document.getElementById('filterStatus').value;
+  if (!status || l.contact_status === status) return;
+  leads = leads.filter(x => x !== l);
+  loaded = loaded.filter(x => x !== l);
+  leadByLink.delete(l.maps_link);
+  totalMatches = Math.max(0, totalMatches - 1);
+}
+
 function closeModal() { document.getElementById('overlay').classList.remove('open'); }
 
 async function saveEdit() {
   const link = document.getElementById('editLink').value;
-  const l = leads.find(x => x.maps_link === link);
+  const l = leadByLink.get(link);
   const body = {
     maps_link: link,
     contact_status: document.getElementById('editStatus').value,
@@ -440,34 +905,40 @@ async function saveEdit() {
   };
   // Log activity
   if (!logActivity('edited', l ? l.name : 'Unknown', `Status: ${body.contact_status}`)) return;
-  await fetch('/api/update', { method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(body) });
+  const res = await fetch('/api/update', { method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(body) });
+  const data = await res.json();
   closeModal();
-  await load();
+  // Patch the edited row in place instead of re-fetching the page
+  if (l && data.lead) {
+    Object.assign(l, data.lead);
+    prepareLead(l);
+    sortIndex = {};
+    dropIfFilteredOut(l);
+  }
+  await loadStats();
+  render();
 }
 
 // Make a call via tel: link (works on mobile)
-function makeCall(encodedLink, phoneClean) {
-  const link = decodeURIComponent(encodedLink);
-  const l = leads.find(x => x.maps_link === link);
+function makeCall(link) {
+  const l = leadByLink.get(link);
   if (!l) return;
   // Log activity
   if (!logActivity('called', l.name, `Phone: ${l.phone}`)) return;
   // Open tel: link
-  window.open('tel:' + phoneClean, '_self');
+  window.open('tel:' + l._phoneClean, '_self');
 }
 
-function sendText(encodedLink, templateType = 'initial') {
-  const link = decodeURIComponent(encodedLink);
-  const l = leads.find(x => x.maps_link === link);
+function sendText(link, templateType = 'initial') {
+  const l = leadByLink.get(link);
   if (!l || !l.phone || l.phone === '—') return;
 
   // Log activity first (will alert if no salesman selected)
   const actionName = templateType === 'initial' ? 'texted (initial)' : 'texted (follow-up)';
   if (!logActivity(actionName, l.name, `Phone: ${l.phone}`)) return;
 
-  const name = l.name.split(/[^a-zA-Z'\\- ]/)[0].trim();
   const template = MSG_TEMPLATES[templateType] || MSG_TEMPLATES.initial;
-  const msg = template.replace('[NAME]', name);
+  const msg = template.replace('[NAME]', l.first_name);
   const phone = l.phone;
 
   // Determine new status based on template type
@@ -486,8 +957,11 @@ function sendText(encodedLink, templateType = 'initial') {
     })
   }).then(() => {
     // Update local state so UI reflects change immediately
+    moveStatusCount(l.contact_status, newStatus);
     l.contact_status = newStatus;
     l.last_contacted = today;
+    sortIndex = {};
+    dropIfFilteredOut(l);
     render();
   });
 
@@ -540,20 +1014,19 @@ function hideToast() {
 
 function onRowCheck() {
   document.querySelectorAll('.row-cb').forEach(cb => {
-    const link = decodeURIComponent(cb.dataset.link);
-    if (cb.checked) selected.add(link);
-    else selected.delete(link);
+    if (cb.checked) selected.add(cb.dataset.link);
+    else selected.delete(cb.dataset.link);
   });
   updateDelBar();
 }
 
 function toggleAll(master) {
-  document.querySelectorAll('.row-cb').forEach(cb => {
-    cb.checked = master.checked;
-    const link = decodeURIComponent(cb.dataset.link);
-    if (master.checked) selected.add(link);
-    else selected.delete(link);
+  // Covers the whole page, including rows outside the rendered window
+  leads.forEach(l => {
+    if (master.checked) selected.add(l.maps_link);
+    else selected.delete(l.maps_link);
   });
+  document.querySelectorAll('.row-cb').forEach(cb => cb.checked = master.checked);
   updateDelBar();
 }
 
@@ -575,15 +1048,24 @@ async function deleteSelected() {
   if (selected.size === 0) return;
   if (!confirm(`Delete ${selected.size} lead(s)? This cannot be undone.`)) return;
   const links = Array.from(selected);
-  await fetch('/api/delete', {
+  const res = await fetch('/api/delete', {
     method: 'POST',
     headers: {'Content-Type': 'application/json'},
     body: JSON.stringify({ maps_links: links })
   });
+  const data = await res.json();
   selected.clear();
   document.getElementById('selectAll').checked = false;
   updateDelBar();
-  await load();
+  // Drop the deleted rows locally instead of re-fetching the page
+  const gone = new Set(data.deleted);
+  leads = leads.filter(l => !gone.has(l.maps_link));
+  loaded = loaded.filter(l => !gone.has(l.maps_link));
+  gone.forEach(link => leadByLink.delete(link));
+  sortIndex = {};
+  totalMatches = Math.max(0, totalMatches - gone.size);
+  await loadStats();
+  render();
 }
 
 // Column sort
@@ -592,14 +1074,19 @@ document.querySelectorAll('th[data-col]').forEach(th => {
     const col = th.dataset.col;
     if (sortCol === col) sortAsc = !sortAsc;
     else { sortCol = col; sortAsc = false; }
-    render();
+    resort();
   });
 });
 
 // Filter listeners
-document.getElementById('filterStatus').addEventListener('change', render);
-document.getElementById('filterScore').addEventListener('change', render);
-document.getElementById('searchBox').addEventListener('input', render);
+document.getElementById('filterStatus').addEventListener('change', refilter);
+document.getElementById('filterScore').addEventListener('change', refilter);
+// Debounce typing so a burst of keystrokes triggers one query + render
+let searchTimer = 0;
+document.getElementById('searchBox').addEventListener('input', () => {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(refilter, 120);
+});
 
 // Escape key closes modals
 document.addEventListener('keydown', e => { if (e.key === 'Escape') { closeModal(); closeLogModal(); } });
@@ -609,113 +1096,716 @@ load();
 </body>
 </html>"""
 
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+# Only whole-line comments and ones trailing a statement after whitespace, so
+# URLs ("https://...") and the bookmarklet's inline JS are left alone.
+_JS_LINE_COMMENT = re.compile(r"^//.*$|(?<=[;{}),])[ \t]+//.*$", re.M)
+
+
+def _strip_lines(text):
+    lines = (line.strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _split_page(page):
+    """Minify the embedded page and pull out its stylesheet and script.
+
+    Returns (head, markup, tail, css, js): the markup before <style>, between
+    </style> and <script>, and after </script>, then the two assets. Blank
+    lines, indentation and comments are dropped; line breaks are kept so JS
+    automatic semicolon insertion is unaffected.
+    """
+    head, _, rest = page.partition("<style>")
+    css, _, rest = rest.partition("</style>")
+    markup, _, rest = rest.partition("<script>")
+    js, _, tail = rest.partition("</script>")
+    js = _JS_LINE_COMMENT.sub("", "\n".join(line.strip() for line in js.split("\n")))
+    return (_strip_lines(head), _strip_lines(markup), _strip_lines(tail),
+            _strip_lines(_CSS_COMMENT.sub("", css)), _strip_lines(js))
+
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _static(body, content_type, cache_control):
+    """Pre-encode a fixed response, headers included (see _send_raw).
+
+    Returns (cache_control, etag, head, body, gzipped_etag, gzipped_head,
+    gzipped_body). Plain and gzipped bodies are different representations,
+    so they get distinct tags.
+    """
+    def head(body, etag, encoding):
+        return (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"ETag: {etag}\r\n"
+            f"Cache-Control: {cache_control}\r\n"
+            "Vary: Accept-Encoding\r\n"
+            f"{encoding}Content-Length: {len(body)}\r\n"
+        ).encode("latin-1")
+
+    body_gz = gzip.compress(body, 9)
+    etag, etag_gz = _etag(body), _etag(body_gz)
+    return (cache_control, etag, head(body, etag, ""), body,
+            etag_gz, head(body_gz, etag_gz, "Content-Encoding: gzip\r\n"), body_gz)
+
+
+def _asset_url(body, ext):
+    return f"/static/crm.{hashlib.blake2b(body, digest_size=4).hexdigest()}.{ext}"
+
+
+# The page never changes at runtime, so minify, encode and compress it once
+# at import. CSS and JS are served as separate files named by content hash:
+# browsers keep them for good, and any edit changes the URL the page links.
+_IMMUTABLE = "public, max-age=31536000, immutable"
+_head, _markup, _tail, _css, _js = _split_page(HTML_PAGE)
+_CSS_BYTES = _css.encode("utf-8")
+_JS_BYTES = _js.encode("utf-8")
+_CSS_URL = _asset_url(_CSS_BYTES, "css")
+_JS_URL = _asset_url(_JS_BYTES, "js")
+_HTML_BYTES = "\n".join([
+    _head, f'<link rel="stylesheet" href="{_CSS_URL}">',
+    _markup, f'<script src="{_JS_URL}"></script>', _tail,
+]).encode("utf-8")
+_STATIC = {
+    "/": _static(_HTML_BYTES, "text/html; charset=utf-8", "public, max-age=60"),
+    _CSS_URL: _static(_CSS_BYTES, "text/css; charset=utf-8", _IMMUTABLE),
+    _JS_URL: _static(_JS_BYTES, "text/javascript; charset=utf-8", _IMMUTABLE),
+}
+
+
+def _open_conn():
+    """Open a connection to leads.db with the CRM's pragmas and index."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA wal_autocheckpoint=1000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    # Reads come straight from the OS page cache instead of being copied
+    # into SQLite's own buffers; the whole leads.db fits comfortably.
+    conn.execute("PRAGMA mmap_size=268435456")
+    # Lets ORDER BY lead_score DESC walk the index instead of sorting.
+    # maps_link needs no extra index: its UNIQUE constraint already has one.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_score ON leads(lead_score DESC)")
+    # Same for status-filtered lists: equality on the first column, then the
+    # rows come out already in lead_score order.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_leads_status_score"
+        " ON leads(contact_status, lead_score DESC)"
+    )
+    return conn
+
+
+@contextmanager
+def _connection():
+    """Check a connection out of the pool for the duration of a block."""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _open_conn()
+    try:
+        yield conn
+    finally:
+        _pool.put(conn)
+
+
+def _close_pool():
+    """Close idle pooled connections at shutdown.
+
+    PRAGMA optimize goes first, as SQLite recommends before closing: it
+    refreshes planner statistics (ANALYZE) for tables whose queries on that
+    connection would benefit, e.g. once the new indexes hold real data.
+    """
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            return
+        conn.execute("PRAGMA optimize")
+        conn.close()
+
+
+def _optimize_periodically(interval=3600):
+    """Keep planner statistics current while the server runs.
+
+    PRAGMA optimize only re-analyzes tables whose statistics look stale, so
+    an hourly call is nearly free when nothing changed, while statistics
+    gathered on a small table don't outlive a large scraper run.
+    """
+    while True:
+        time.sleep(interval)
+        with _connection() as conn:
+            conn.execute("PRAGMA optimize")
+
+
+def _ensure_fts(conn):
+    """Create the leads_fts search index and its triggers if missing.
+
+    The index is rebuilt only when it or one of its triggers had to be
+    created (writes may have gone unindexed meanwhile) or when it no longer
+    lines up with leads. Returns False, leaving search on LIKE, if this
+    SQLite lacks FTS5 or trigrams. The triggers are then dropped: they live
+    in leads.db, and while they exist every write to leads, scraper.py's
+    included, needs FTS5 too.
+    """
+    global _fts_enabled
+    try:
+        with _write_txn(conn):
+            found = {row[0] for row in conn.execute(
+                _SQL_FTS_OBJECTS, ("leads_fts", *_FTS_TRIGGER_NAMES))}
+            conn.execute(_SQL_CREATE_FTS)
+            for sql in _SQL_FTS_TRIGGERS:
+                conn.execute(sql)
+            conn.execute(_SQL_FTS_PROBE).fetchall()
+            if (len(found) < 1 + len(_FTS_TRIGGER_NAMES)
+                    or conn.execute(_SQL_FTS_FINGERPRINT).fetchone()
+                    != conn.execute(_SQL_LEADS_FINGERPRINT).fetchone()):
+                conn.execute("INSERT INTO leads_fts(leads_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        with _write_txn(conn):
+            for name in _FTS_TRIGGER_NAMES:
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        return False
+    _fts_enabled = True
+    return True
+
+
+def _encode_json(obj):
+    """Serialize obj into this thread's reusable buffer and return the buffer.
+
+    The buffer is overwritten by the thread's next call, so write it out (or
+    copy it) before serializing anything else. With orjson the result is a
+    fresh bytes object instead.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    buf = getattr(_tls, "buf", None)
+    if buf is None:
+        buf = _tls.buf = bytearray()
+    buf.clear()
+    for chunk in _json_encoder.iterencode(obj):
+        buf += chunk.encode()
+    return buf
+
+
+def _lead_dict(cols, row):
+    """Build the JSON shape of one lead, adding the derived first_name."""
+    lead = dict(zip(cols, row))
+    lead["first_name"] = _FIRST_NAME_END.split(lead["name"] or "", 1)[0].strip()
+    return lead
+
+
+def _is_lead_edit(data):
+    """True if a decoded POST body has the keys a lead edit needs."""
+    return isinstance(data, dict) and "maps_link" in data and "contact_status" in data
+
+
+@contextmanager
+def _write_txn(conn):
+    """Run a block of writes as one BEGIN IMMEDIATE ... COMMIT transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _db_version():
+    """Cheap change marker for leads.db: stat of the main file and its WAL."""
+    version = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            st = os.stat(path)
+            version += (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            version += (0, 0)
+    return tuple(version)
+
+
+def _cache_key(path):
+    version = _db_version()
+    with _cache_lock:
+        return (_cache_gen, version, path)
+
+
+def _cache_get(key):
+    """Return a live cache entry or None.
+
+    Entries are (expires_at, body, gzipped_body, headers, etag, gzipped_etag);
+    the gzipped fields are None for bodies too small to be worth compressing.
+    """
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry
+    return None
+
+
+def _date_header():
+    """The Date header line for now, formatted at most once a second."""
+    global _http_date
+    now = int(time.time())
+    if _http_date[0] != now:
+        _http_date = (now, b"Date: %s\r\n" % formatdate(now, usegmt=True).encode())
+    return _http_date[1]
+
+
+def _key_etag(key, gz):
+    tag = hashlib.blake2b(_ETAG_SALT + repr(key).encode(), digest_size=8).hexdigest()
+    # Plain and gzipped bodies are different representations
+    return f'"{tag}-gz"' if gz else f'"{tag}"'
+
+
+def _cache_put(key, body, headers=(), always_gzip=False):
+    # always_gzip keeps a gzipped copy however small the body is. Streamed
+    # responses are gzipped, and their ETag sent, before the size is known;
+    # the cached copy must carry the same ETag for If-None-Match to match.
+    now = time.monotonic()
+    if always_gzip or len(body) >= _GZIP_MIN_SIZE:
+        body_gz = gzip.compress(body, 6)
+        etag_gz = _key_etag(key, True)
+    else:
+        body_gz = etag_gz = None
+    entry = (now + _CACHE_TTL, body, body_gz, tuple(headers), _key_etag(key, False), etag_gz)
+    with _cache_lock:
+        for k in [k for k, e in _cache.items() if e[0] <= now]:
+            del _cache[k]
+        if key[0] == _cache_gen:
+            _cache[key] = entry
+    return entry
+
+
+def _invalidate_cache():
+    global _cache_gen
+    with _cache_lock:
+        _cache_gen += 1
+        _cache.clear()
+
+
+def _append_log(line):
+    """Append one line to activity_log.jsonl, batching concurrent callers.
+
+    Whoever gets the write lock writes every line queued so far in a single
+    write; callers whose line went out in someone else's batch find the queue
+    empty and return. Either way the line is in the file when this returns.
+    """
+    global _log_file
+    with _log_lock:
+        _log_pending.append(line)
+    with _log_write_lock:
+        with _log_lock:
+            batch = b"".join(_log_pending)
+            _log_pending.clear()
+        if not batch:
+            return
+        if _log_file is None:
+            _log_file = open(LOG_PATH, "ab")
+        _log_file.write(batch)
+        _log_file.flush()
+
 
 class CRMHandler(BaseHTTPRequestHandler):
+    # Persistent connections: every response carries a Content-Length or is
+    # sent chunked, so the browser can reuse the socket for the next call.
+    protocol_version = "HTTP/1.1"
+    # Responses are small and written whole; don't let Nagle hold the last
+    # segment back waiting for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
     def do_OPTIONS(self):
         """Handle CORS preflight for bookmarklet cross-origin requests."""
-        self.send_response(200)
-        self._cors_headers()
-        self.send_header("Content-Length", "0")
-        self.end_headers()
+        self.log_request(204)
+        self.wfile.write(_OPTIONS_HEAD + _date_header() + b"\r\n")
 
     def do_GET(self):
-        parsed = urlparse(self.path)
-
-        if parsed.path == "/api/leads":
-            self._send_json(self._get_leads())
-        elif parsed.path == "/api/pending":
-            self._send_json(PENDING)
-        elif parsed.path == "/" or parsed.path == "":
-            self._send_html(HTML_PAGE)
+        path, _, query = self.path.partition("?")
+        route = self._GET_ROUTES.get(path)
+        if route:
+            route(self, query)
+        elif (path or "/") in _STATIC:
+            self._send_static(_STATIC[path or "/"])
         else:
             self.send_error(404)
 
     def do_POST(self):
-        length = int(self.headers.get("Content-Length", 0))
-        body = json.loads(self.rfile.read(length))
-
-        if self.path == "/api/update":
-            self._update_lead(body)
-            self._send_json({"ok": True})
-        elif self.path == "/api/delete":
-            self._delete_leads(body.get("maps_links", []))
-            self._send_json({"ok": True})
-        elif self.path == "/api/pending":
-            PENDING["phone"] = body.get("phone", "")
-            PENDING["msg"] = body.get("msg", "")
-            self._send_json({"ok": True})
-        elif self.path == "/api/log":
-            self._log_activity(body)
-            self._send_json({"ok": True})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self.send_error(400, "Bad Content-Length")
+            return
+        if length > _MAX_POST_BODY:
+            self.send_error(413)
+            self.close_connection = True  # the unread body is still on the wire
+            return
+        buf = bytearray(length)
+        if self.rfile.readinto(buf) != length:
+            self.send_error(400, "Truncated body")
+            return
+        try:
+            body = _loads(buf)
+        except ValueError:  # json.JSONDecodeError and orjson's both subclass it
+            self.send_error(400, "Invalid JSON")
+            return
+
+        route = self._POST_ROUTES.get(self.path)
+        if route:
+            route(self, body)
         else:
             self.send_error(404)
 
-    def _get_leads(self):
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute("SELECT * FROM leads ORDER BY lead_score DESC").fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+    def _get_leads(self, query):
+        key = _cache_key(self.path)
+        entry = _cache_get(key)
+        if entry:
+            self._send_cached(entry)
+            return
+        etag = _key_etag(key, self._accepts_gzip())
+        validators = [("ETag", etag), *_API_CACHE_HEADERS]
+        if self._etag_matches(etag):
+            self._send_not_modified(etag, _API_CACHE_HEADERS)
+            return
+        params, count_sql, sql = self._lead_query(parse_qs(query))
+        body = bytearray()
+        with _connection() as conn:
+            total = conn.execute(count_sql, params).fetchone()[0]
+            headers = [("X-Total-Count", str(total))]
+            # Column names once, then one array per lead: no repeated keys
+            cols, rows = self._lead_rows(conn, sql, params)
+            self._send_json_array(rows, headers=headers + validators, sink=body,
+                                  prefix=b'{"cols":' + _dumps(cols) + b',"rows":',
+                                  suffix=b"}")
+        _cache_put(key, bytes(body), headers, always_gzip=True)
+
+    def _get_stats(self, query):
+        key = _cache_key(self.path)
+        entry = _cache_get(key)
+        if not entry:
+            with _connection() as conn:
+                stats = dict(conn.execute(_SQL_STATS).fetchone())
+            entry = _cache_put(key, bytes(_encode_json(stats)))
+        self._send_cached(entry)
+
+    def _get_pending(self, query):
+        self._send_json(PENDING)
+
+    def _post_update(self, body):
+        if not _is_lead_edit(body):
+            self.send_error(400, "Expected a lead edit")
+            return
+        lead = self._update_lead(body)
+        _invalidate_cache()
+        self._send_json({"ok": True, "lead": lead})
+
+    def _post_update_bulk(self, body):
+        if not isinstance(body, list) or not all(map(_is_lead_edit, body)):
+            self.send_error(400, "Expected a list of lead edits")
+            return
+        updated = self._update_leads(body)
+        _invalidate_cache()
+        self._send_json({"ok": True, "updated": updated})
+
+    def _post_delete(self, body):
+        links = body.get("maps_links", []) if isinstance(body, dict) else None
+        if not isinstance(links, list) or not all(isinstance(x, str) for x in links):
+            self.send_error(400, "Expected a list of maps_links")
+            return
+        deleted = self._delete_leads(links)
+        _invalidate_cache()
+        self._send_json({"ok": True, "deleted": deleted})
+
+    def _post_pending(self, body):
+        if not isinstance(body, dict):
+            self.send_error(400, "Expected a JSON object")
+            return
+        PENDING["phone"] = body.get("phone", "")
+        PENDING["msg"] = body.get("msg", "")
+        self._send_json({"ok": True})
+
+    def _post_log(self, body):
+        if not isinstance(body, dict):
+            self.send_error(400, "Expected a JSON object")
+            return
+        self._log_activity(body)
+        self._send_json({"ok": True})
+
+    # Exact-path dispatch: one dict lookup per request. Routes take the raw
+    # query string (GET) or the decoded JSON body (POST).
+    _GET_ROUTES = {
+        "/api/leads": _get_leads,
+        "/api/stats": _get_stats,
+        "/api/pending": _get_pending,
+    }
+    _POST_ROUTES = {
+        "/api/update": _post_update,
+        "/api/update_bulk": _post_update_bulk,
+        "/api/delete": _post_delete,
+        "/api/pending": _post_pending,
+        "/api/log": _post_log,
+    }
+
+    def _lead_query(self, qs):
+        """Turn /api/leads query-string args into (params, count SQL, page SQL)."""
+        def arg(name, default=""):
+            return qs.get(name, [default])[0].strip()
+
+        def int_arg(name, default):
+            try:
+                return int(arg(name))
+            except ValueError:
+                return default
+
+        q = arg("q")
+        search = fts = None
+        if len(q) >= _FTS_MIN_QUERY and _fts_enabled:
+            search, fts = "fts", '"' + q.replace('"', '""') + '"'
+        elif q:
+            search = "like"
+            q = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        params = {
+            "status": arg("status") or None,
+            "min_score": int_arg("min_score", 0),
+            "q": q or None,
+            "fts": fts,
+            "limit": min(max(int_arg("limit", _DEFAULT_PAGE_SIZE), 1), _MAX_PAGE_SIZE),
+            "offset": max(int_arg("offset", 0), 0),
+        }
+        col = arg("sort", "lead_score")
+        if col not in _LEAD_SORT_COLS:
+            col = "lead_score"
+        direction = "ASC" if arg("dir").lower() == "asc" else "DESC"
+        key = (params["status"] is not None, search)
+        return params, _SQL_COUNT_LEADS[key], _SQL_LEADS_PAGE[(col, direction, *key)]
+
+    def _lead_rows(self, conn, sql, params):
+        """Run a lead query; return (column names, iterator of row tuples).
+
+        Rows come straight off the cursor as plain tuples, with the derived
+        first_name appended as a last column.
+        """
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        name = cols.index("name")
+        cols.append("first_name")
+        rows = (
+            (*row, _FIRST_NAME_END.split(row[name] or "", 1)[0].strip())
+            for row in cur
+        )
+        return cols, rows
 
     def _update_lead(self, data):
-        conn = sqlite3.connect(DB_PATH)
+        """Apply a CRM edit and return the updated lead (None if not found)."""
+        now = datetime.now(timezone.utc).isoformat()
+        params = (data["contact_status"], data.get("last_contacted") or None,
+                  data.get("notes") or None, now, data["maps_link"])
+        with _connection() as conn, _write_txn(conn):
+            if _HAS_RETURNING:
+                cur = conn.execute(_SQL_UPDATE_LEAD, params)
+            else:
+                conn.execute(_SQL_UPDATE_LEAD_BASE, params)
+                cur = conn.execute(_SQL_LEAD_BY_LINK, (data["maps_link"],))
+            row = cur.fetchone()
+            cols = tuple(d[0] for d in cur.description)
+        return _lead_dict(cols, row) if row else None
+
+    def _update_leads(self, edits):
+        """Apply a list of CRM edits in one transaction; return rows changed."""
+        if not edits:
+            return 0
         now = datetime.now(timezone.utc).isoformat()
-        conn.execute(
-            "UPDATE leads SET contact_status=?, last_contacted=?, notes=?, updated_at=? WHERE maps_link=?",
+        rows = [
             (data["contact_status"], data.get("last_contacted") or None,
              data.get("notes") or None, now, data["maps_link"])
-        )
-        conn.commit()
-        conn.close()
+            for data in edits
+        ]
+        with _connection() as conn, _write_txn(conn):
+            return conn.executemany(_SQL_UPDATE_LEAD_BASE, rows).rowcount
 
     def _delete_leads(self, maps_links):
+        """Delete leads by maps_link and return the links actually removed."""
         if not maps_links:
-            return
-        conn = sqlite3.connect(DB_PATH)
-        placeholders = ",".join("?" for _ in maps_links)
-        conn.execute(f"DELETE FROM leads WHERE maps_link IN ({placeholders})", maps_links)
-        conn.commit()
-        conn.close()
+            return []
+        with _connection() as conn:
+            conn.execute(_SQL_CREATE_DEL_TMP)
+            with _write_txn(conn):
+                conn.execute("DELETE FROM _del")
+                conn.executemany(_SQL_INSERT_DEL_TMP, ((link,) for link in maps_links))
+                if _HAS_RETURNING:
+                    deleted = [row[0] for row in conn.execute(_SQL_DELETE_STAGED)]
+                else:
+                    deleted = [row[0] for row in conn.execute(_SQL_SELECT_STAGED)]
+                    conn.execute(_SQL_DELETE_STAGED_BASE)
+                conn.execute("DELETE FROM _del")
+            if len(deleted) > _OPTIMIZE_AFTER_DELETES:
+                conn.execute("PRAGMA optimize")
+        return deleted
 
     def _log_activity(self, data):
         """Append activity to irrevocable log file."""
-        log_path = os.path.join(os.path.dirname(DB_PATH), "activity_log.jsonl")
-        entry = {
-            "timestamp": data.get("timestamp", datetime.now(timezone.utc).isoformat()),
-            "salesman": data.get("salesman", "unknown"),
-            "action": data.get("action", ""),
-            "lead": data.get("lead", ""),
-            "details": data.get("details", "")
-        }
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry) + "\n")
+        timestamp = data.get("timestamp")
+        if timestamp is None:  # the page always sends one; only build it if not
+            timestamp = datetime.now(timezone.utc).isoformat()
+        _append_log(_LOG_LINE % (
+            _dumps(timestamp),
+            _dumps(data.get("salesman", "unknown")),
+            _dumps(data.get("action", "")),
+            _dumps(data.get("lead", "")),
+            _dumps(data.get("details", "")),
+        ))
 
     def _cors_headers(self):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
 
+    def _accepts_gzip(self):
+        return "gzip" in self.headers.get("Accept-Encoding", "")
+
     def _send_json(self, obj):
-        body = json.dumps(obj).encode()
+        body = _encode_json(obj)
+        gz = len(body) >= _GZIP_MIN_SIZE and self._accepts_gzip()
+        if gz:
+            body = gzip.compress(body, compresslevel=1)
+        self._send_raw(b"".join((
+            _JSON_HEAD,
+            b"Content-Encoding: gzip\r\n" if gz else b"",
+            b"Content-Length: %d\r\n" % len(body),
+        )), body)
+
+    def _send_raw(self, head, body):
+        """Send a 200 response from a pre-built header block and a body.
+
+        `head` is the status line and headers minus Date and the blank line
+        that ends them. Everything goes to the socket in one sendmsg call,
+        without first copying header and body into one buffer.
+        """
+        self.log_request(200)
+        bufs = (head, _date_header(), b"\r\n", body)
+        try:
+            sent = self.request.sendmsg(bufs)
+        except AttributeError:  # no sendmsg on this platform
+            sent = 0
+        for buf in bufs:  # whatever a short send left over
+            if sent >= len(buf):
+                sent -= len(buf)
+                continue
+            self.wfile.write(memoryview(buf)[sent:])
+            sent = 0
+
+    def _etag_matches(self, etag):
+        """True if the request's If-None-Match names this (strong) ETag."""
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+        return "*" in tags or etag in tags
+
+    def _send_not_modified(self, etag, extra_headers=()):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_cached(self, entry):
+        _, body, body_gz, headers, etag, etag_gz = entry
+        gz = body_gz is not None and self._accepts_gzip()
+        if gz:
+            body, etag = body_gz, etag_gz
+        if self._etag_matches(etag):
+            self._send_not_modified(etag, (*_API_CACHE_HEADERS, *headers))
+            return
+        self._send_raw(b"".join((
+            _JSON_HEAD,
+            b"ETag: %s\r\n" % etag.encode(),
+            _API_CACHE_HEAD,
+            *(b"%s: %s\r\n" % (name.encode(), value.encode()) for name, value in headers),
+            b"Content-Encoding: gzip\r\n" if gz else b"",
+            b"Content-Length: %d\r\n" % len(body),
+        )), body)
+
+    def _send_json_array(self, items, headers=(), sink=None, flush_at=64 * 1024,
+                         prefix=b"", suffix=b""):
+        """Stream a JSON array item-by-item without building the full list.
+
+        The length isn't known up front, so the body goes out with chunked
+        transfer-encoding (or, for HTTP/1.0 clients, is delimited by closing
+        the connection). `prefix` and `suffix` wrap the array, e.g. to make it
+        a member of an object. If `sink` is given, the uncompressed bytes are
+        also appended to it.
+        """
+        # wbits=31 makes zlib emit a gzip container
+        z = zlib.compressobj(1, zlib.DEFLATED, 31) if self._accepts_gzip() else None
         self.send_response(200)
         self._cors_headers()
         self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        if z:
+            self.send_header("Content-Encoding", "gzip")
+        chunked = self.request_version != "HTTP/1.0"
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
+            self.close_connection = True
         self.end_headers()
-        self.wfile.write(body)
 
-    def _send_html(self, html):
-        body = html.encode()
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        def send(data):
+            if not data:
+                return
+            if chunked:
+                data = b"%x\r\n%s\r\n" % (len(data), data)
+            self.wfile.write(data)
+
+        def write(data):
+            if sink is not None:
+                sink.extend(data)
+            send(z.compress(bytes(data)) if z else data)
+
+        buf = bytearray(prefix + b"[")
+        sep = b""
+        for item in items:
+            buf += sep
+            buf += _dumps(item)
+            sep = b","
+            if len(buf) >= flush_at:
+                write(buf)
+                buf.clear()
+        buf += b"]" + suffix
+        write(buf)
+        if z:
+            send(z.flush())
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _send_static(self, asset):
+        cache_control, etag, head, body, etag_gz, head_gz, body_gz = asset
+        if self._accepts_gzip():
+            etag, head, body = etag_gz, head_gz, body_gz
+        if self._etag_matches(etag):
+            self._send_not_modified(etag, [("Cache-Control", cache_control),
+                                           ("Vary", "Accept-Encoding")])
+            return
+        self._send_raw(head, body)
 
     def log_message(self, format, *args):
         pass  # Suppress per-request logs
 
 
+class CRMServer(ThreadingHTTPServer):
+    daemon_threads = True  # don't let in-flight requests block Ctrl+C
+    # A page load opens several connections at once (page, assets, leads,
+    # stats); with the default listen backlog of 5, bursts get reset.
+    request_queue_size = 64
+
+
 def main():
     parser = argparse.ArgumentParser(description="CRM web UI for leads.db")
     parser.add_argument("--port", type=int, default=8080)
@@ -725,14 +1815,34 @@ def main():
         print(f"Error: {DB_PATH} not found. Run scraper.py first.")
         return
 
-    server = HTTPServer(("0.0.0.0", args.port), CRMHandler)
+    with _connection() as conn:
+        if not _ensure_fts(conn):
+            print("Note: SQLite has no FTS5 trigram support; search uses LIKE scans")
+        for by_status, index in ((False, "idx_leads_score"), (True, "idx_leads_status_score")):
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN " + _SQL_LEADS_PAGE[("lead_score", "DESC", by_status, None)],
+                {"status": "new", "min_score": 0, "q": None, "limit": 1, "offset": 0},
+            ).fetchall()
+            if any("TEMP B-TREE" in row[-1] for row in plan):
+                print(f"Warning: lead list query is not using {index} for ORDER BY")
+
+    threading.Thread(target=_optimize_periodically, daemon=True).start()
+    server = CRMServer(("0.0.0.0", args.port), CRMHandler)
     print(f"CRM running at http://localhost:{args.port}")
     print(f"Database: {DB_PATH}")
     print("Press Ctrl+C to stop")
     try:
-        server.serve_forever()
+        # Nothing calls server.shutdown(), so there's no flag to poll for:
+        # block in the (epoll) selector until a connection arrives rather
+        # than waking every half second. Ctrl+C still interrupts the wait.
+        server.serve_forever(poll_interval=None)
     except KeyboardInterrupt:
         print("\nStopped.")
+    finally:
+        server.server_close()
+        _close_pool()
+        if _log_file is not None:
+            _log_file.close()
 
 
 if __name__ == "__main__":
@@ -18,10 +18,13 @@ import sys
 import time
 import random
 import logging
-from datetime import datetime, timezone
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from urllib.parse import quote_plus
 
-import pandas as pd
+from openpyxl import Workbook
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -32,7 +35,6 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     NoSuchElementException,
     TimeoutException,
-    StaleElementReferenceException,
 )
 
 logging.basicConfig(
@@ -45,13 +47,50 @@ log = logging.getLogger(__name__)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(SCRIPT_DIR, "leads.db")
 
+# Patterns run against every card and detail page, compiled once up front.
+_RE_RATING = re.compile(r'\b([1-5](?:\.\d)?)\b')
+_RE_REVIEWS_PAREN = re.compile(r'\(([0-9,]+)\)')
+_RE_REVIEWS_WORD = re.compile(r'(\d[\d,]*)\s*review', re.IGNORECASE)
+# A line that could be a card's category: not starting like a rating, price or
+# count, not opening hours, no "review", and under 60 characters once stripped
+_RE_CATEGORY = re.compile(
+    r'^[^\S\n]*(?![0-9(.$]|Open|Closed)(?![^\n]*(?i:review))'
+    r'(?=\S)([^\n]{1,59}?)[^\S\n]*$',
+    re.M,
+)
+_RE_MONTHS = re.compile(r'(\d+)\s*month')
+_RE_PHONE = re.compile(r'[\(\d][\d\s\-\(\)]{6,}')
+_RE_ADDRESS = re.compile(r'\d+.*(?:St|Ave|Rd|Blvd|Dr|Ln|Way|Ct|Pl|Hwy|Pike|Pkwy|Route)')
+_RE_ARIA_PREFIX = re.compile(r'^[^:]+:\s*')
+_RE_PHOTO_COUNT = re.compile(r'(\d[\d,]*)\s*photo', re.IGNORECASE)
+_RE_ABOUT = re.compile(r'\bAbout\b.*\bFrom the business\b', re.S)
+_RE_SERVICE_PRICE = re.compile(r'\bService\w*\b.*\$')
+_RE_REVIEW_AGE = re.compile(r'(\d+\s+(?:day|week|month|year)s?\s+ago|a\s+(?:day|week|month|year)\s+ago)')
+_RE_SLUG = re.compile(r'[^a-z0-9]+')
+# Any of these in the detail panel's text means opening hours are listed
+_HOURS_WORDS = ("Open 24 hours", "Opens", "Closed", "Hours")
+
 # ---------------------------------------------------------------------------
 # SQLite CRM database
 # ---------------------------------------------------------------------------
 
+def _connect():
+    """Open leads.db in WAL mode, the same journal the CRM server uses.
+
+    Autocommit (isolation_level=None): writes that must be atomic open their
+    own transaction.
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+
 def init_db():
     """Create the leads table if it doesn't exist."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     conn.execute("""
         CREATE TABLE IF NOT EXISTS leads (
             -- Scraped data
@@ -88,64 +127,91 @@ def init_db():
             updated_at      TEXT
         )
     """)
-    conn.commit()
     conn.close()
     log.info(f"Database ready: {DB_PATH}")
 
 
+# Phase 2 fields a recent database row can stand in for on a re-run
+_DETAIL_COLUMNS = (
+    "address", "phone", "website", "photo_url", "photo_count",
+    "has_description", "has_services", "owner_responds", "newest_review", "has_hours",
+)
+_BOOL_DETAIL_COLUMNS = {"has_description", "has_services", "owner_responds", "has_hours"}
+
+
+def load_fresh_details(listings, max_age_days=7):
+    """Copy stored details into listings scraped within max_age_days.
+
+    Returns the listings that still need their detail page scraped.
+    """
+    links = [l["maps_link"] for l in listings]
+    if not links:
+        return []
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+    conn = _connect()
+    cur = conn.execute(
+        f"SELECT maps_link, {', '.join(_DETAIL_COLUMNS)} FROM leads"
+        f" WHERE scraped_at >= ? AND maps_link IN ({','.join('?' * len(links))})",
+        [cutoff] + links,
+    )
+    fresh = {row[0]: row[1:] for row in cur}
+    conn.close()
+
+    stale = []
+    for listing in listings:
+        row = fresh.get(listing["maps_link"])
+        if row is None:
+            stale.append(listing)
+            continue
+        for col, val in zip(_DETAIL_COLUMNS, row):
+            if col in _BOOL_DETAIL_COLUMNS:
+                val = bool(val)
+            listing[col] = val if val is not None else listing[col]
+    return stale
+
+
 def upsert_leads(listings, query):
     """Insert or update leads, preserving CRM fields on re-scrape."""
-    conn = sqlite3.connect(DB_PATH)
-    now = datetime.now(timezone.utc).isoformat()
-
-    for lead in listings:
-        # Check if this lead already exists (by maps_link)
-        row = conn.execute(
-            "SELECT contact_status, last_contacted, notes, scraped_at FROM leads WHERE maps_link = ?",
-            (lead["maps_link"],)
-        ).fetchone()
-
-        if row:
-            # Update scraped fields, preserve CRM fields
-            conn.execute("""
-                UPDATE leads SET
-                    name=?, address=?, phone=?, website=?, rating=?, review_count=?,
-                    category=?, photo_url=?, photo_count=?, has_description=?,
-                    has_services=?, owner_responds=?, newest_review=?, has_hours=?,
-                    lead_score=?, score_reasons=?, query=?, updated_at=?
-                WHERE maps_link=?
-            """, (
-                lead["name"], lead["address"], lead["phone"], lead["website"],
-                lead["rating"], lead["review_count"], lead["category"],
-                lead["photo_url"], lead.get("photo_count"),
-                lead.get("has_description", False), lead.get("has_services", False),
-                lead.get("owner_responds", False), lead.get("newest_review", ""),
-                lead.get("has_hours", False),
-                lead.get("lead_score", 0), lead.get("score_reasons", ""),
-                query, now,
-                lead["maps_link"],
-            ))
-        else:
-            # New lead
-            conn.execute("""
-                INSERT INTO leads (
-                    name, address, phone, website, rating, review_count,
-                    category, maps_link, photo_url, photo_count, has_description,
-                    has_services, owner_responds, newest_review, has_hours,
-                    lead_score, score_reasons, contact_status, query, scraped_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'new', ?, ?, ?)
-            """, (
-                lead["name"], lead["address"], lead["phone"], lead["website"],
-                lead["rating"], lead["review_count"], lead["category"],
-                lead["maps_link"], lead["photo_url"], lead.get("photo_count"),
-                lead.get("has_description", False), lead.get("has_services", False),
-                lead.get("owner_responds", False), lead.get("newest_review", ""),
-                lead.get("has_hours", False),
-                lead.get("lead_score", 0), lead.get("score_reasons", ""),
-                query, now, now,
-            ))
-
-    conn.commit()
+    conn = _connect()
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    rows = [(
+        lead["name"], lead["address"], lead["phone"], lead["website"],
+        lead["rating"], lead["review_count"], lead["category"],
+        lead["maps_link"], lead["photo_url"], lead.get("photo_count"),
+        lead.get("has_description", False), lead.get("has_services", False),
+        lead.get("owner_responds", False), lead.get("newest_review", ""),
+        lead.get("has_hours", False),
+        lead.get("lead_score", 0), lead.get("score_reasons", ""),
+        query, now, now,
+    ) for lead in listings]
+
+    # One statement per lead and one transaction for the run. On a known
+    # maps_link only the scraped fields are overwritten; contact_status,
+    # last_contacted, notes and scraped_at are left as the CRM has them.
+    # IMMEDIATE takes the write lock up front, so a CRM edit landing mid-run
+    # waits on the busy timeout instead of failing a lock upgrade.
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany("""
+        INSERT INTO leads (
+            name, address, phone, website, rating, review_count,
+            category, maps_link, photo_url, photo_count, has_description,
+            has_services, owner_responds, newest_review, has_hours,
+            lead_score, score_reasons, contact_status, query, scraped_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'new', ?, ?, ?)
+        ON CONFLICT(maps_link) DO UPDATE SET
+            name=excluded.name, address=excluded.address, phone=excluded.phone,
+            website=excluded.website, rating=excluded.rating,
+            review_count=excluded.review_count, category=excluded.category,
+            photo_url=excluded.photo_url, photo_count=excluded.photo_count,
+            has_description=excluded.has_description,
+            has_services=excluded.has_services,
+            owner_responds=excluded.owner_responds,
+            newest_review=excluded.newest_review, has_hours=excluded.has_hours,
+            lead_score=excluded.lead_score, score_reasons=excluded.score_reasons,
+            query=excluded.query, updated_at=excluded.updated_at
+    """, rows)
+    conn.execute("COMMIT")
     conn.close()
     log.info(f"Upserted {len(listings)} leads into database")
 
@@ -215,7 +281,7 @@ def _review_is_stale(newest_review_text):
     if "year" in text:
         return True
     # "N months ago" where N >= 6
-    m = re.search(r'(\d+)\s*month', text)
+    m = _RE_MONTHS.search(text)
     if m and int(m.group(1)) >= 6:
         return True
     return False
@@ -225,6 +291,30 @@ def _review_is_stale(newest_review_text):
 # Browser setup
 # ---------------------------------------------------------------------------
 
+# Requests Chrome refuses before connecting: photos, map tiles, and ad and
+# analytics beacons. The place data itself comes from www.google.com/maps
+# and is left alone; photo_url only needs the img src, not the image.
+_BLOCKED_URLS = [
+    "*.ggpht.com/*",
+    "*.googleusercontent.com/*",
+    "*streetviewpixels-pa.googleapis.com/*",
+    "*www.google.com/maps/vt*",
+    "*.doubleclick.net/*",
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+]
+
+
+def _configure_cdp(driver):
+    """Block _BLOCKED_URLS in this browser through the DevTools protocol."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+    except Exception as e:
+        log.debug(f"Could not set blocked URLs: {e}")
+    return driver
+
+
 def create_driver():
     """Create a headless Chromium driver with anti-detection flags."""
     opts = Options()
@@ -241,22 +331,71 @@ def create_driver():
     # Suppress logging noise
     opts.add_argument("--log-level=3")
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    # Only the DOM text matters; skip the photos and thumbnails every Maps
+    # page pulls in, and return from get() at DOMContentLoaded rather than
+    # after every subresource has finished.
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+    opts.page_load_strategy = "eager"
 
     # Try common chromedriver locations
     for path in ["/usr/bin/chromedriver", "/usr/lib/chromium-browser/chromedriver",
                  "/snap/bin/chromium.chromedriver"]:
         if os.path.exists(path):
             service = Service(executable_path=path)
-            return webdriver.Chrome(service=service, options=opts)
+            return _configure_cdp(webdriver.Chrome(service=service, options=opts))
 
     # Fall back to letting Selenium find it
-    return webdriver.Chrome(options=opts)
+    return _configure_cdp(webdriver.Chrome(options=opts))
 
 
 # ---------------------------------------------------------------------------
 # Phase 1 — Collect listings from search results
 # ---------------------------------------------------------------------------
 
+# Returns "results" once listing links are on the page, "consent" after
+# clicking a consent button, or null to be polled again.
+_CONSENT_JS = """
+if (document.querySelector('a[href*="/maps/place/"]')) return "results";
+const words = ["accept", "reject all", "alles afwijzen", "akzeptieren", "aceptar"];
+for (const b of document.querySelectorAll("button")) {
+    const t = (b.textContent || "").trim().toLowerCase();
+    if (t && words.some(w => t.includes(w))) {
+        b.click();
+        return "consent";
+    }
+}
+return null;
+"""
+
+
+# Counts result cards added under the feed, so the scroll loop can move on as
+# soon as a scroll has loaded one instead of always sleeping. Only nodes that
+# are or contain a listing link count; spinners, icons and text don't.
+_WATCH_FEED_JS = """
+const card = 'a[href*="/maps/place/"]';
+window.__newCards = 0;
+new MutationObserver(ms => {
+    for (const m of ms) {
+        for (const n of m.addedNodes) {
+            if (n.nodeType === 1 && (n.matches(card) || n.querySelector(card))) {
+                window.__newCards++;
+            }
+        }
+    }
+}).observe(arguments[0], {childList: true, subtree: true});
+"""
+_SCROLL_FEED_JS = """
+window.__newCards = 0;
+arguments[0].scrollTop = arguments[0].scrollHeight;
+"""
+_FEED_STATE_JS = """
+return [window.__newCards, document.querySelectorAll('a[href*="/maps/place/"]').length];
+"""
+
+
 def scroll_results_panel(driver, max_listings):
     """Scroll the Maps results panel to load more listings."""
     # The scrollable results feed — try multiple selectors
@@ -278,18 +417,22 @@ def scroll_results_panel(driver, max_listings):
         log.warning("Could not find results feed panel to scroll")
         return
 
+    driver.execute_script(_WATCH_FEED_JS, feed)
     last_count = 0
     stale_rounds = 0
     max_stale = 5
 
     while stale_rounds < max_stale:
         # Scroll down inside the feed
-        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed)
-        time.sleep(1.5 + random.random())
-
-        # Count how many listing links we have now
-        links = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/maps/place/"]')
-        current_count = len(links)
+        driver.execute_script(_SCROLL_FEED_JS, feed)
+
+        # Return as soon as the feed grows; give up after 1.5-2.5 s
+        deadline = time.monotonic() + 1.5 + random.random()
+        while True:
+            time.sleep(0.1)
+            added, current_count = driver.execute_script(_FEED_STATE_JS)
+            if added or time.monotonic() >= deadline:
+                break
         log.info(f"  Scrolled — {current_count} listings visible")
 
         if current_count >= max_listings:
@@ -301,82 +444,78 @@ def scroll_results_panel(driver, max_listings):
         last_count = current_count
 
 
+# Everything Phase 1 reads off a result card, gathered in one WebDriver call
+# instead of three or four per card.
+_CARDS_JS = """
+return Array.from(document.querySelectorAll('a[href*="/maps/place/"]'), a => ({
+    href: a.href || "",
+    aria: a.getAttribute("aria-label") || "",
+    text: (a.parentElement || a).innerText || "",
+}));
+"""
+
+
 def extract_listings_from_search(driver, max_listings):
     """Extract listing cards from the search results page."""
     listings = []
     seen_names = set()
 
-    # Find all listing anchor elements
-    cards = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/maps/place/"]')
+    # Snapshot every listing anchor with its label and its container's text
+    cards = driver.execute_script(_CARDS_JS) or []
     log.info(f"Found {len(cards)} listing links on page")
 
     for card in cards:
         if len(listings) >= max_listings:
             break
-        try:
-            href = card.get_attribute("href") or ""
-            aria = card.get_attribute("aria-label") or ""
-
-            if not href or "/maps/place/" not in href:
-                continue
-
-            name = aria.strip()
-            if not name:
-                continue
-            if name in seen_names:
-                continue
-            seen_names.add(name)
-
-            # Try to get rating, review count, and category from nearby text
-            # These are typically in the card's parent container
-            parent = card
-            try:
-                parent = card.find_element(By.XPATH, "./..")
-            except Exception:
-                pass
-
-            text_block = parent.text if parent else ""
-
-            rating = extract_rating(text_block)
-            review_count = extract_review_count(text_block)
-            category = extract_category(text_block, name)
-
-            listings.append({
-                "name": name,
-                "rating": rating,
-                "review_count": review_count,
-                "category": category,
-                "maps_link": href,
-                # Filled in Phase 2
-                "address": "",
-                "phone": "",
-                "website": "",
-                "photo_url": "",
-                # Quality signals (Phase 2)
-                "photo_count": 0,
-                "has_description": False,
-                "has_services": False,
-                "owner_responds": False,
-                "newest_review": "",
-                "has_hours": False,
-                # Scoring (set after Phase 2)
-                "lead_score": 0,
-                "score_reasons": "",
-            })
-            log.info(f"  [{len(listings)}] {name} ({rating}* / {review_count} reviews)")
-
-        except StaleElementReferenceException:
+        href = card["href"]
+        if not href or "/maps/place/" not in href:
+            continue
+
+        name = card["aria"].strip()
+        if not name:
             continue
-        except Exception as e:
-            log.debug(f"  Skipping card: {e}")
+        if name in seen_names:
             continue
+        seen_names.add(name)
+
+        # Rating, review count, and category come from the text of the
+        # card's parent container
+        text_block = card["text"]
+
+        rating = extract_rating(text_block)
+        review_count = extract_review_count(text_block)
+        category = extract_category(text_block, name)
+
+        listings.append({
+            "name": name,
+            "rating": rating,
+            "review_count": review_count,
+            "category": category,
+            "maps_link": href,
+            # Filled in Phase 2
+            "address": "",
+            "phone": "",
+            "website": "",
+            "photo_url": "",
+            # Quality signals (Phase 2)
+            "photo_count": 0,
+            "has_description": False,
+            "has_services": False,
+            "owner_responds": False,
+            "newest_review": "",
+            "has_hours": False,
+            # Scoring (set after Phase 2)
+            "lead_score": 0,
+            "score_reasons": "",
+        })
+        log.info(f"  [{len(listings)}] {name} ({rating}* / {review_count} reviews)")
 
     return listings
 
 
 def extract_rating(text):
     """Pull a rating like '4.5' from text."""
-    m = re.search(r'\b([1-5](?:\.\d)?)\b', text)
+    m = _RE_RATING.search(text)
     if m:
         val = float(m.group(1))
         if 1.0 <= val <= 5.0:
@@ -387,10 +526,10 @@ def extract_rating(text):
 def extract_review_count(text):
     """Pull a review count like '(123)' or '123 reviews' from text."""
     # Match patterns like (123), (1,234), (1.2K)
-    m = re.search(r'\(([0-9,]+)\)', text)
+    m = _RE_REVIEWS_PAREN.search(text)
     if m:
         return int(m.group(1).replace(",", ""))
-    m = re.search(r'(\d[\d,]*)\s*review', text, re.IGNORECASE)
+    m = _RE_REVIEWS_WORD.search(text)
     if m:
         return int(m.group(1).replace(",", ""))
     return None
@@ -398,19 +537,11 @@ def extract_review_count(text):
 
 def extract_category(text, name):
     """Try to extract the business category from the text block."""
-    lines = text.split("\n")
-    # Category is often the line right after rating info
-    for i, line in enumerate(lines):
-        line = line.strip()
-        # Skip the name, rating lines, price indicators
-        if line == name or not line:
-            continue
-        if re.match(r'^[0-9(.$]', line):
-            continue
-        if "review" in line.lower():
-            continue
-        # A line that looks like a category (short, no digits at start)
-        if len(line) < 60 and not line.startswith("Open") and not line.startswith("Closed"):
+    # Category is often the line right after rating info; take the first
+    # line that looks like one and isn't the name
+    for m in _RE_CATEGORY.finditer(text):
+        line = m.group(1)
+        if line != name:
             return line
     return ""
 
@@ -419,6 +550,64 @@ def extract_category(text, name):
 # Phase 2 — Get details for each listing
 # ---------------------------------------------------------------------------
 
+# Everything Phase 2 reads off a detail page, gathered in one WebDriver call.
+# For each field, every selector in order yields the attributes and text of
+# the first element it matches (or null); the parsing stays in Python. The
+# main panel's text, the costliest read, is only included when a selector
+# probe left a signal undecided.
+_DETAIL_JS = """
+const q = s => document.querySelector(s);
+const read = sel => {
+    const el = q(sel);
+    return el && {
+        "aria-label": el.getAttribute("aria-label"),
+        "href": el.href || el.getAttribute("href"),
+        "data-item-id": el.getAttribute("data-item-id"),
+        "text": el.innerText || "",
+    };
+};
+const photo = q('button[jsaction*="photo"] img, div.RZ66Rb img, img.p0Hhde');
+const review = q("span.rsqaWe");
+const d = {
+    phone: [
+        'button[data-tooltip="Copy phone number"]',
+        'button[aria-label*="Phone"]',
+        'button[data-item-id*="phone"]',
+        'a[href^="tel:"]',
+    ].map(read),
+    website: [
+        'a[data-tooltip="Open website"]',
+        'a[data-item-id="authority"]',
+        'a[aria-label*="Website"]',
+        'a[aria-label*="website"]',
+    ].map(read),
+    address: [
+        'button[data-tooltip="Copy address"]',
+        'button[data-item-id*="address"]',
+        'button[aria-label*="Address"]',
+    ].map(read),
+    photo_src: photo ? photo.src || "" : "",
+    photo_labels: Array.from(
+        document.querySelectorAll('button[aria-label*="photo" i], button[aria-label*="Photo" i]'),
+        b => b.getAttribute("aria-label") || ""),
+    photo_thumbs: document.querySelectorAll('button[jsaction*="photo"]').length,
+    has_description: ['div[aria-label*="About"]', "div.PYvSYb", 'span[jsan*="description"]']
+        .some(s => q(s) !== null),
+    has_services: q('div[aria-label*="Services"]') !== null,
+    owner_responds: document.evaluate('//*[contains(text(),"Response from")]', document,
+        null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null,
+    newest_review: review ? (review.innerText || "").trim() : "",
+    has_hours: q('div[aria-label*="Hours"], button[data-item-id*="oh"], table.eK4R0e') !== null,
+    page_text: "",
+};
+if (!(d.has_description && d.has_services && d.newest_review && d.has_hours)) {
+    const main = q('div[role="main"]');
+    d.page_text = main ? main.innerText || "" : "";
+}
+return d;
+"""
+
+
 def scrape_listing_detail(driver, listing):
     """Open a listing's Maps page and extract detail info."""
     url = listing["maps_link"]
@@ -436,173 +625,97 @@ def scrape_listing_detail(driver, listing):
     # Give extra time for dynamic content
     time.sleep(1.5)
 
+    page = driver.execute_script(_DETAIL_JS)
+
     # --- Phone ---
     listing["phone"] = extract_detail_field(
-        driver,
-        selectors=[
-            'button[data-tooltip="Copy phone number"]',
-            'button[aria-label*="Phone"]',
-            'button[data-item-id*="phone"]',
-            'a[href^="tel:"]',
-        ],
+        page["phone"],
         attr_patterns=["aria-label", "href", "data-item-id"],
-        text_pattern=r'[\(\d][\d\s\-\(\)]{6,}',
+        text_pattern=_RE_PHONE,
     )
 
     # --- Website ---
     listing["website"] = extract_detail_field(
-        driver,
-        selectors=[
-            'a[data-tooltip="Open website"]',
-            'a[data-item-id="authority"]',
-            'a[aria-label*="Website"]',
-            'a[aria-label*="website"]',
-        ],
+        page["website"],
         attr_patterns=["href"],
         href_filter=True,
     )
 
     # --- Address ---
     listing["address"] = extract_detail_field(
-        driver,
-        selectors=[
-            'button[data-tooltip="Copy address"]',
-            'button[data-item-id*="address"]',
-            'button[aria-label*="Address"]',
-        ],
+        page["address"],
         attr_patterns=["aria-label"],
-        text_pattern=r'\d+.*(?:St|Ave|Rd|Blvd|Dr|Ln|Way|Ct|Pl|Hwy|Pike|Pkwy|Route)',
+        text_pattern=_RE_ADDRESS,
     )
 
     # --- Photo URL ---
-    try:
-        photo_el = driver.find_element(
-            By.CSS_SELECTOR, 'button[jsaction*="photo"] img, div.RZ66Rb img, img.p0Hhde'
-        )
-        src = photo_el.get_attribute("src") or ""
-        if src and "googleusercontent" in src:
-            listing["photo_url"] = src
-    except (NoSuchElementException, Exception):
-        pass
+    src = page["photo_src"]
+    if src and "googleusercontent" in src:
+        listing["photo_url"] = src
 
     # --- Quality Signals ---
-    _extract_quality_signals(driver, listing)
+    _extract_quality_signals(page, listing)
 
 
-def _extract_quality_signals(driver, listing):
-    """Extract quality signals from the currently loaded detail page."""
-    page_text = ""
-    try:
-        main_el = driver.find_element(By.CSS_SELECTOR, 'div[role="main"]')
-        page_text = main_el.text
-    except Exception:
-        pass
-
+def _extract_quality_signals(page, listing):
+    """Fill in quality signals from a detail page read by _DETAIL_JS."""
     # Photo count — look for "Photos" button with count in aria-label
     listing["photo_count"] = 0
-    try:
-        photo_btns = driver.find_elements(
-            By.CSS_SELECTOR,
-            'button[aria-label*="photo" i], button[aria-label*="Photo" i]'
-        )
-        for btn in photo_btns:
-            aria = btn.get_attribute("aria-label") or ""
-            m = re.search(r'(\d[\d,]*)\s*photo', aria, re.IGNORECASE)
-            if m:
-                listing["photo_count"] = int(m.group(1).replace(",", ""))
-                break
-        # Fallback: count thumbnail images in photo area
-        if listing["photo_count"] == 0:
-            thumbs = driver.find_elements(By.CSS_SELECTOR, 'button[jsaction*="photo"]')
-            if thumbs:
-                listing["photo_count"] = len(thumbs)
-    except Exception:
-        pass
-
-    # Has description — About / description section
-    listing["has_description"] = False
-    try:
-        desc_selectors = [
-            'div[aria-label*="About"]',
-            'div.PYvSYb',   # description block
-            'span[jsan*="description"]',
-        ]
-        for sel in desc_selectors:
-            els = driver.find_elements(By.CSS_SELECTOR, sel)
-            if els:
-                listing["has_description"] = True
-                break
-        # Also check page text for "About" section markers
-        if not listing["has_description"] and re.search(r'\bAbout\b.*\bFrom the business\b', page_text, re.S):
-            listing["has_description"] = True
-    except Exception:
-        pass
-
-    # Has services section
-    listing["has_services"] = False
-    try:
-        svc_els = driver.find_elements(By.CSS_SELECTOR, 'div[aria-label*="Services"]')
-        if svc_els:
-            listing["has_services"] = True
-        elif "Services" in page_text and re.search(r'\bService\w*\b.*\$', page_text):
-            listing["has_services"] = True
-    except Exception:
-        pass
-
-    # Owner responds to reviews
-    listing["owner_responds"] = False
-    try:
-        resp_els = driver.find_elements(By.XPATH,
-            '//*[contains(text(),"Response from the owner") or contains(text(),"Response from")]'
-        )
-        if resp_els:
-            listing["owner_responds"] = True
-    except Exception:
-        pass
-
-    # Newest review date
-    listing["newest_review"] = ""
-    try:
-        review_dates = driver.find_elements(By.CSS_SELECTOR, 'span.rsqaWe')
-        if review_dates:
-            listing["newest_review"] = review_dates[0].text.strip()
-        else:
-            # Fallback: look for "X ago" patterns in review area
-            m = re.search(r'(\d+\s+(?:day|week|month|year)s?\s+ago|a\s+(?:day|week|month|year)\s+ago)', page_text)
-            if m:
-                listing["newest_review"] = m.group(0)
-    except Exception:
-        pass
-
-    # Has hours
-    listing["has_hours"] = False
-    try:
-        hours_els = driver.find_elements(By.CSS_SELECTOR,
-            'div[aria-label*="Hours"], button[data-item-id*="oh"], table.eK4R0e'
-        )
-        if hours_els:
-            listing["has_hours"] = True
-        elif re.search(r'(Open 24 hours|Opens|Closed|Hours)', page_text):
-            listing["has_hours"] = True
-    except Exception:
-        pass
-
+    for aria in page["photo_labels"]:
+        m = _RE_PHOTO_COUNT.search(aria)
+        if m:
+            listing["photo_count"] = int(m.group(1).replace(",", ""))
+            break
+    # Fallback: count thumbnail images in photo area
+    if listing["photo_count"] == 0:
+        listing["photo_count"] = page["photo_thumbs"]
+
+    listing["has_description"] = page["has_description"]
+    listing["has_services"] = page["has_services"]
+    listing["owner_responds"] = page["owner_responds"]
+    listing["newest_review"] = page["newest_review"]
+    listing["has_hours"] = page["has_hours"]
+
+    # Text fallbacks for whatever the selectors didn't settle; page_text is
+    # only filled in when one of them is still open
+    page_text = page["page_text"]
+    if not page_text:
+        return
 
-def extract_detail_field(driver, selectors, attr_patterns=None, text_pattern=None, href_filter=False):
-    """Try multiple CSS selectors to extract a detail field value."""
-    for sel in selectors:
-        try:
-            el = driver.find_element(By.CSS_SELECTOR, sel)
-        except NoSuchElementException:
+    # Substring checks rule most pages out before the regex has to scan
+    if (not listing["has_description"] and "From the business" in page_text
+            and _RE_ABOUT.search(page_text)):
+        listing["has_description"] = True
+    if (not listing["has_services"] and "Services" in page_text and "$" in page_text
+            and _RE_SERVICE_PRICE.search(page_text)):
+        listing["has_services"] = True
+    if not listing["newest_review"] and " ago" in page_text:
+        # Look for "X ago" patterns in review area
+        m = _RE_REVIEW_AGE.search(page_text)
+        if m:
+            listing["newest_review"] = m.group(0)
+    if not listing["has_hours"] and any(w in page_text for w in _HOURS_WORDS):
+        listing["has_hours"] = True
+
+
+def extract_detail_field(candidates, attr_patterns=None, text_pattern=None, href_filter=False):
+    """Pick a detail field value from the elements _DETAIL_JS read for it.
+
+    candidates holds, per selector in priority order, the first matching
+    element's attributes and text, or None if the selector matched nothing.
+    text_pattern, if given, is a compiled regex the value must contain.
+    """
+    for el in candidates:
+        if not el:
             continue
 
         # For website links, grab the href directly
         if href_filter:
-            href = el.get_attribute("href") or ""
+            href = el["href"] or ""
             if href and href.startswith("http") and "google" not in href:
                 return href
             # Sometimes the aria-label has the URL
-            aria = el.get_attribute("aria-label") or ""
+            aria = el["aria-label"] or ""
             if aria and "." in aria and " " not in aria.strip():
                 url = aria.strip()
                 if not url.startswith("http"):
@@ -613,25 +726,25 @@ def extract_detail_field(driver, selectors, attr_patterns=None, text_pattern=Non
         # Try aria-label and other attributes
         if attr_patterns:
             for attr in attr_patterns:
-                val = el.get_attribute(attr) or ""
+                val = el[attr] or ""
                 if val:
                     if attr == "href" and val.startswith("tel:"):
                         return val.replace("tel:", "").strip()
                     if text_pattern:
-                        m = re.search(text_pattern, val)
+                        m = text_pattern.search(val)
                         if m:
                             return m.group(0).strip()
                     elif val:
                         # Clean up aria-label text like "Address: 123 Main St"
-                        cleaned = re.sub(r'^[^:]+:\s*', '', val).strip()
+                        cleaned = _RE_ARIA_PREFIX.sub('', val).strip()
                         if cleaned:
                             return cleaned
 
         # Fall back to element text
-        text = el.text.strip()
+        text = el["text"].strip()
         if text:
             if text_pattern:
-                m = re.search(text_pattern, text)
+                m = text_pattern.search(text)
                 if m:
                     return m.group(0).strip()
             else:
@@ -640,16 +753,93 @@ def extract_detail_field(driver, selectors, attr_patterns=None, text_pattern=Non
     return ""
 
 
+class TokenBucket:
+    """Thread-safe rate limiter: take() blocks until a token is available.
+
+    Tokens refill at `rate` per second, up to `burst` saved up. A caller that
+    has to wait also waits up to `jitter` extra seconds, picked at random, so
+    requests don't land on a fixed beat.
+    """
+
+    def __init__(self, rate, burst=1, jitter=0.0):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.tokens = burst
+        self.ts = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+            self.ts = now
+            need = 1 - self.tokens
+            if need > 0:
+                # Sleep holding the lock so waiting workers go one at a time
+                time.sleep(need / self.rate + random.random() * self.jitter)
+                self.tokens = 0
+                self.ts = time.monotonic()
+            else:
+                self.tokens -= 1
+
+
+def scrape_details(drivers, listings, rate):
+    """Phase 2: fill in detail fields for every listing.
+
+    Each driver is a separate browser working through the list alongside the
+    others, pausing a random 2-3.5 s after each page. Together they open at
+    most `rate` detail pages per second.
+    """
+    idle = queue.Queue()
+    for driver in drivers:
+        idle.put(driver)
+    bucket = TokenBucket(rate, jitter=1.5)
+    total = len(listings)
+
+    def work(item):
+        i, listing = item
+        driver = idle.get()
+        try:
+            # Polite pacing between requests, shared by all workers
+            bucket.take()
+            log.info(f"  [{i+1}/{total}] {listing['name']}")
+            try:
+                scrape_listing_detail(driver, listing)
+            except Exception as e:
+                log.warning(f"  Failed to get details: {e}")
+
+            # Polite delay between requests
+            delay = 2 + random.random() * 1.5
+            time.sleep(delay)
+        finally:
+            idle.put(driver)
+
+    with ThreadPoolExecutor(max_workers=len(drivers)) as pool:
+        # list() so an unexpected error in a worker surfaces here
+        list(pool.map(work, enumerate(listings)))
+
+
 # ---------------------------------------------------------------------------
 # Output
 # ---------------------------------------------------------------------------
 
-def save_outputs(listings, query, output_dir="output"):
-    """Save listings to JSON and Excel files."""
+# Spreadsheet columns — scoring first, then contact info, then signals
+_XLSX_COLUMNS = [
+    "lead_score", "score_reasons",
+    "name", "address", "phone", "website",
+    "rating", "review_count", "category",
+    "photo_count", "has_description", "has_services",
+    "owner_responds", "newest_review", "has_hours",
+    "maps_link", "photo_url",
+]
+
+
+def save_outputs(listings, slug, output_dir="output"):
+    """Save listings to JSON and Excel files named after the query slug."""
     os.makedirs(output_dir, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    slug = re.sub(r'[^a-z0-9]+', '_', query.lower()).strip('_')
     base = f"{slug}_{timestamp}"
 
     json_path = os.path.join(output_dir, f"{base}.json")
@@ -660,22 +850,13 @@ def save_outputs(listings, query, output_dir="output"):
         json.dump(listings, f, indent=2, ensure_ascii=False)
     log.info(f"JSON saved: {json_path}")
 
-    # Excel
-    df = pd.DataFrame(listings)
-    # Reorder columns — scoring first, then contact info, then signals
-    col_order = [
-        "lead_score", "score_reasons",
-        "name", "address", "phone", "website",
-        "rating", "review_count", "category",
-        "photo_count", "has_description", "has_services",
-        "owner_responds", "newest_review", "has_hours",
-        "maps_link", "photo_url",
-    ]
-    for c in col_order:
-        if c not in df.columns:
-            df[c] = ""
-    df = df[col_order]
-    df.to_excel(xlsx_path, index=False, engine="openpyxl")
+    # Excel — streamed row by row; write-only mode keeps no cell objects
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(_XLSX_COLUMNS)
+    for l in listings:
+        ws.append([l.get(c, "") for c in _XLSX_COLUMNS])
+    wb.save(xlsx_path)
     log.info(f"Excel saved: {xlsx_path}")
 
     return json_path, xlsx_path
@@ -696,18 +877,29 @@ def main():
                         help="Minimum lead score to include in output (default: 5)")
     parser.add_argument("--all", action="store_true",
                         help="Output all listings with scores (no filtering)")
+    parser.add_argument("--rescrape", action="store_true",
+                        help="Re-scrape detail pages of leads scraped in the last 7 days")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Browsers scraping detail pages in parallel (default: 4)")
+    parser.add_argument("--rate", type=float, default=0.15,
+                        help="Detail pages opened per second across all browsers (default: 0.15)")
     args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
 
     query = args.query
     max_listings = args.max_listings
     min_score = args.min_score
     show_all = args.all
+    workers = max(1, args.workers)
 
     log.info(f"Query: {query}")
     log.info(f"Max listings: {max_listings}")
 
-    # Build the search URL (force English with hl=en)
+    # Build the search URL (force English with hl=en), and the file name
+    # stem the outputs are saved under
     search_url = f"https://www.google.com/maps/search/{quote_plus(query)}?hl=en"
+    slug = _RE_SLUG.sub('_', query.lower()).strip('_')
 
     driver = create_driver()
     try:
@@ -715,49 +907,17 @@ def main():
         log.info("Phase 1: Loading search results...")
         driver.get(search_url)
 
-        # Handle consent / cookie dialogs (multiple languages)
-        try:
-            consent_btn = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH,
-                    '//button['
-                    'contains(text(),"Accept all") or '
-                    'contains(text(),"Reject all") or '
-                    'contains(text(),"Accept") or '
-                    'contains(text(),"Alles accepteren") or '
-                    'contains(text(),"Alles afwijzen") or '
-                    'contains(text(),"Tout accepter") or '
-                    'contains(text(),"Alle akzeptieren") or '
-                    'contains(text(),"Aceptar todo")'
-                    ']'))
-            )
-            consent_btn.click()
-            log.info("Dismissed consent dialog")
-            time.sleep(2)
-        except TimeoutException:
-            pass  # No consent dialog
-
-        # Also try form-based consent (some regions use a form)
-        try:
-            form_btns = driver.find_elements(By.CSS_SELECTOR,
-                'form[action*="consent"] button, '
-                'div[role="dialog"] button, '
-                'div[jsname] button[jsname]'
-            )
-            for btn in form_btns:
-                txt = btn.text.lower()
-                if any(w in txt for w in ["accept", "accepter", "akzeptieren", "aceptar", "accepteren"]):
-                    btn.click()
-                    log.info("Dismissed consent dialog (form)")
-                    time.sleep(2)
-                    break
-        except Exception:
-            pass
-
-        # Wait for results to load
+        # Handle consent / cookie dialogs (multiple languages) and wait for
+        # results in the same in-page probe, so a page with no dialog goes
+        # straight on instead of sitting out a consent timeout
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/maps/place/"]'))
-            )
+            found = WebDriverWait(driver, 15).until(lambda d: d.execute_script(_CONSENT_JS))
+            if found == "consent":
+                log.info("Dismissed consent dialog")
+                time.sleep(2)
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/maps/place/"]'))
+                )
         except TimeoutException:
             log.error("No search results loaded. Google may be blocking or the query returned no results.")
             driver.save_screenshot("/tmp/scraper_debug.png")
@@ -780,16 +940,21 @@ def main():
 
         # ── Phase 2: Get details for each listing ──
         log.info("Phase 2: Scraping detail pages...")
-        for i, listing in enumerate(listings):
-            log.info(f"  [{i+1}/{len(listings)}] {listing['name']}")
-            try:
-                scrape_listing_detail(driver, listing)
-            except Exception as e:
-                log.warning(f"  Failed to get details: {e}")
-
-            # Polite delay between requests
-            delay = 2 + random.random() * 1.5
-            time.sleep(delay)
+        init_db()
+        # Leads already in the database from the last week keep their
+        # stored details; only the rest get their detail page opened
+        to_scrape = listings if args.rescrape else load_fresh_details(listings)
+        if len(to_scrape) < len(listings):
+            log.info(f"  {len(listings) - len(to_scrape)} listings scraped recently, using stored details")
+        # The Phase 1 browser is one of the workers; start the rest now
+        extra_drivers = []
+        try:
+            for _ in range(min(workers, len(to_scrape)) - 1):
+                extra_drivers.append(create_driver())
+            scrape_details([driver] + extra_drivers, to_scrape, args.rate)
+        finally:
+            for d in extra_drivers:
+                d.quit()
 
         log.info("Phase 2 complete")
 
@@ -812,12 +977,11 @@ def main():
         high_priority = len(output_listings)
 
         # ── Save only qualifying leads to database ──
-        init_db()
         upsert_leads(output_listings, query)
 
         # ── Save filtered output to JSON / Excel ──
         output_dir = os.path.join(SCRIPT_DIR, "output")
-        json_path, xlsx_path = save_outputs(output_listings, query, output_dir)
+        json_path, xlsx_path = save_outputs(output_listings, slug, output_dir)
 
         # ── Print summary ──
         print(f"\n{'='*60}")